@@ -0,0 +1,197 @@
+"""Generate a synthetic page tree for the benchmarks.
+
+The tree looks like a typical multilingual site::
+
+    Root
+    └── Home (BenchmarkIndexPage, site root)
+        ├── en (ArticlePage)
+        │   ├── group 1 (ArticlePage)
+        │   ├── group 2 (ChapterPage)
+        │   └── ...
+        ├── de (ArticlePage)
+        └── ...
+
+Every translation group has a page in the default language, and in each
+other language with a probability of `coverage`. The pages below the
+language roots are inserted in bulk, as creating them one by one through
+treebeard takes hours at a realistic scale.
+"""
+import os
+import random
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import router, transaction
+from django.utils import timezone
+
+from wagtail.wagtailcore.models import Page, Site
+
+from wagtail_page_translation.members import insert_members
+from wagtail_page_translation.models import Language
+from wagtail_page_translation.operations import get_page_models, insert_rows
+
+from .models import GROUP_PAGE_MODELS, ArticlePage, BenchmarkIndexPage
+
+
+def get_group_key(number):
+    """Return the deterministic translation key of group `number`."""
+    return uuid.UUID(int=number + 1)
+
+
+def is_benchmark_database(using):
+    """Return whether a database may be flushed without asking.
+
+    That is the case for the database named after the benchmarks, and for
+    a SQLite file which does not exist yet.
+    """
+    database = settings.DATABASES[using]
+    name = database['NAME']
+    if database['ENGINE'].endswith('sqlite3'):
+        if not os.path.exists(name):
+            return True
+        name = os.path.splitext(os.path.basename(name))[0]
+    return name == settings.BENCHMARK_DATABASE_NAME
+
+
+def reset_database(using, reset=False):
+    """Migrate and flush the database.
+
+    :param using: alias of the database
+    :param reset: flush the database even if it is not the benchmark
+        database
+    :raises ValueError: if the database is not the benchmark database and
+        `reset` is False
+
+    """
+    if not reset and not is_benchmark_database(using):
+        raise ValueError(
+            "Refusing to flush the database %r, which is not the benchmark "
+            "database %r. Pass --reset to flush it anyway." % (
+                settings.DATABASES[using]['NAME'],
+                settings.BENCHMARK_DATABASE_NAME))
+    call_command('migrate', interactive=False, verbosity=0)
+    call_command('flush', interactive=False, verbosity=0)
+
+
+def create_languages(count):
+    codes = [code for code, name in settings.LANGUAGES][:count]
+    if len(codes) < count:
+        raise ValueError("Only %d languages are available." % len(codes))
+    Language.objects.bulk_create([
+        Language(code=code, is_default=(position == 0), order=position)
+        for position, code in enumerate(codes)])
+    return list(Language.objects.order_by('order'))
+
+
+def insert_pages(pages, using):
+    """Insert new pages which have their tree positions already set."""
+    insert_rows(Page, pages, using)
+
+    # The paths of a chunk are consecutive siblings
+    ids = dict(
+        Page.objects
+        .filter(depth=pages[0].depth,
+                path__range=(pages[0].path, pages[-1].path))
+        .values_list('path', 'pk'))
+
+    by_model = defaultdict(list)
+    for page in pages:
+        for model in get_page_models(type(page)):
+            setattr(page, model._meta.pk.attname, ids[page.path])
+            if model is not Page:
+                by_model[model].append(page)
+
+    for model in sorted(
+            by_model, key=lambda model: len(model._meta.get_parent_list())):
+        insert_rows(model, by_model[model], using)
+
+    insert_members(pages)
+
+
+def generate(languages=10, groups=2000, coverage=0.8, chunk_size=1000,
+             seed=0, progress=None, reset=False):
+    """Create a fresh database with a synthetic tree.
+
+    :param languages: number of languages
+    :param groups: number of translation groups below the language roots
+    :param coverage: probability of a group to exist in a language other
+        than the default language
+    :param chunk_size: number of pages inserted per transaction
+    :param seed: seed for the random coverage
+    :param progress: callable receiving a progress message
+    :param reset: flush the database even if it is not the benchmark
+        database
+    :return: dict describing the generated tree
+
+    """
+    using = router.db_for_write(Page)
+    reset_database(using, reset=reset)
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    languages = create_languages(languages)
+
+    root = Page.add_root(instance=Page(title="Root", slug='root'))
+    home = root.add_child(
+        instance=BenchmarkIndexPage(title="Home", slug='home'))
+    Site.objects.create(
+        hostname='localhost', root_page=home, is_default_site=True)
+
+    content_types = ContentType.objects.get_for_models(*GROUP_PAGE_MODELS)
+    root_key = uuid.uuid4()
+    page_count = 0
+
+    for language in languages:
+        home = Page.objects.get(pk=home.pk)
+        language_root = home.add_child(instance=ArticlePage(
+            title="Home (%s)" % language.code, slug=language.code,
+            language=language, translation_key=root_key))
+        page_count += 1
+
+        numbers = [
+            number for number in range(groups)
+            if language.is_default or rng.random() < coverage]
+        for start in range(0, len(numbers), chunk_size):
+            pages = []
+            for position, number in enumerate(
+                    numbers[start:start + chunk_size], start + 1):
+                model = GROUP_PAGE_MODELS[number % len(GROUP_PAGE_MODELS)]
+                slug = 'page-%d' % number
+                pages.append(model(
+                    title="Page %d (%s)" % (number, language.code),
+                    draft_title="Page %d (%s)" % (number, language.code),
+                    slug=slug,
+                    path=Page._get_path(
+                        language_root.path, language_root.depth + 1,
+                        position),
+                    depth=language_root.depth + 1,
+                    numchild=0,
+                    url_path=language_root.url_path + slug + '/',
+                    content_type=content_types[model],
+                    live=True,
+                    has_unpublished_changes=False,
+                    first_published_at=now,
+                    last_published_at=now,
+                    latest_revision_created_at=now,
+                    language=language,
+                    translation_key=get_group_key(number),
+                ))
+            with transaction.atomic(using=using):
+                insert_pages(pages, using)
+            page_count += len(pages)
+            if progress:
+                progress("%s: %d/%d pages" % (
+                    language.code, start + len(pages), len(numbers)))
+
+        Page.objects.filter(pk=language_root.pk).update(numchild=len(numbers))
+
+    return {
+        'languages': len(languages),
+        'groups': groups,
+        'coverage': coverage,
+        'pages': page_count,
+        'home_id': home.pk,
+    }
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:39
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0040_page_draft_title'),
+        ('wagtail_page_translation', '0002_unique_translation_key_language'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticlePage',
+            fields=[
+                ('translatablepage_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('wagtail_page_translation.translatablepage',),
+        ),
+        migrations.CreateModel(
+            name='BenchmarkIndexPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.Page')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('wagtailcore.page',),
+        ),
+        migrations.CreateModel(
+            name='ChapterPage',
+            fields=[
+                ('translatablepage_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('number', models.IntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('wagtail_page_translation.translatablepage',),
+        ),
+        migrations.CreateModel(
+            name='SectionPage',
+            fields=[
+                ('translatablepage_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('summary', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('wagtail_page_translation.translatablepage',),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import models
+
+from wagtail_page_translation.models import (
+    AbstractTranslationIndexPage, TranslatablePage)
+
+
+class BenchmarkIndexPage(AbstractTranslationIndexPage):
+    pass
+
+
+class ArticlePage(TranslatablePage):
+    body = models.TextField(blank=True)
+
+
+class ChapterPage(TranslatablePage):
+    number = models.IntegerField(default=0)
+
+
+class SectionPage(TranslatablePage):
+    summary = models.CharField(max_length=255, blank=True)
+
+
+# Page types of the generated translation groups, used in turn
+GROUP_PAGE_MODELS = [ArticlePage, ChapterPage, SectionPage]
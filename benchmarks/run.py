@@ -0,0 +1,338 @@
+"""Benchmark the translation lookups on a synthetic tree.
+
+Run from the root of the repository::
+
+    python -m benchmarks.run --languages 50 --groups 20000 --output run.json
+
+Every case is measured cold (all caches cleared before each call) and
+warm (after a first call). Results are written as JSON, and can be
+compared with an earlier run to fail on regressions::
+
+    python -m benchmarks.run --baseline run.json
+
+Set `BENCHMARK_DATABASE=postgres` to run against PostgreSQL instead of
+SQLite. The database is flushed, it is named by `BENCHMARK_PGDATABASE`
+(default: `wagtail_page_translation_benchmarks`) and the other connection
+parameters are taken from the usual `PG*` environment variables. Any
+other database than the benchmark database is only flushed with
+`--reset`.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    sys.path.insert(0, os.path.join(ROOT, 'src'))
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+    import django
+    django.setup()
+
+
+def clear_caches():
+    from django.contrib.contenttypes.models import ContentType
+    from django.core.cache import cache
+
+    from wagtail_page_translation.cache import language_registry
+
+    # Also holds Wagtail's site root paths
+    cache.clear()
+    ContentType.objects.clear_cache()
+    language_registry.clear()
+
+
+def measure(func):
+    """Return the number of queries and the milliseconds of `func()`."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        start = time.time()
+        func()
+        duration = (time.time() - start) * 1000
+    return len(context.captured_queries), duration
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'min': values[0],
+        'median': values[len(values) // 2],
+        'max': values[-1],
+    }
+
+
+class Benchmark(object):
+
+    def __init__(self, tree, samples, repeat, seed):
+        from django.contrib.auth import get_user_model
+        from django.test import Client
+
+        from wagtail_page_translation.models import (
+            Language, TranslatablePage)
+
+        self.tree = tree
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        self.languages = list(Language.objects.order_by('order'))
+
+        user = get_user_model().objects.create_superuser(
+            'benchmark', 'benchmark@example.com', 'benchmark')
+        self.client = Client()
+        self.client.force_login(user)
+
+        page_ids = list(
+            TranslatablePage.objects
+            .filter(depth=4)
+            .values_list('pk', flat=True))
+        self.page_ids = self.rng.sample(page_ids, min(samples, len(page_ids)))
+
+        # A page with a missing translation, for `add_translation`
+        self.untranslated = None
+        for page in TranslatablePage.objects.filter(pk__in=self.page_ids):
+            codes = set(
+                TranslatablePage.objects
+                .filter(translation_key=page.translation_key)
+                .values_list('language__code', flat=True))
+            missing = [
+                language for language in self.languages
+                if language.code not in codes]
+            if missing:
+                self.untranslated = (page.pk, missing[0])
+                break
+
+    def get_page(self, page_id):
+        from wagtail_page_translation.models import TranslatablePage
+        return TranslatablePage.objects.get(pk=page_id)
+
+    def get_language(self):
+        return self.rng.choice(self.languages)
+
+    def case_get_translations(self, page_id):
+        page = self.get_page(page_id)
+        return lambda: list(page.get_translations())
+
+    def case_get_translation(self, page_id):
+        page = self.get_page(page_id)
+        language = self.get_language()
+        return lambda: page.get_translation(language)
+
+    def case_with_translations(self, page_id):
+        from wagtail_page_translation.models import TranslatablePage
+        parent = self.get_page(page_id).get_parent()
+
+        def listing():
+            pages = (
+                TranslatablePage.objects
+                .child_of(parent)
+                .order_by('path')[:20]
+                .with_translations())
+            for page in pages:
+                page.get_translations()
+        return listing
+
+    def case_get_languages(self, page_id):
+        from django.template import Context, Template
+        from django.test import RequestFactory
+
+        page = self.get_page(page_id).specific
+        template = Template(
+            '{% load get_languages %}'
+            '{% get_languages page as languages %}'
+            '{% for language in languages.list %}{{ language.url }}'
+            '{% endfor %}')
+        context = Context({
+            'page': page,
+            'request': RequestFactory().get(page.url),
+            'LANGUAGE_CODE': page.language.code,
+        })
+        return lambda: template.render(context)
+
+    def case_root_redirect(self, page_id):
+        language = self.get_language()
+        return lambda: self.client.get(
+            '/', HTTP_ACCEPT_LANGUAGE='%s,en;q=0.5' % language.code)
+
+    def case_revisions_index(self, page_id):
+        return lambda: self.client.get(
+            '/admin/translate/%d/' % page_id)
+
+    def case_add_translation(self, page_id):
+        page_id, language = self.untranslated
+        return lambda: self.client.get(
+            '/admin/translate/%d/add-translation/%s/' % (
+                page_id, language.code))
+
+    def case_add_translation_post(self, page_id):
+        from django.db import transaction
+
+        page_id, language = self.untranslated
+        page = self.get_page(page_id)
+        parent = page.get_translation_parent(language)
+
+        def post():
+            with transaction.atomic():
+                response = self.client.post(
+                    '/admin/translate/%d/add-translation/%s/' % (
+                        page_id, language.code), {
+                        'new_title': page.title,
+                        'new_slug': page.slug,
+                        'new_parent_page': parent.pk,
+                        'publish_copies': 'on',
+                    })
+                assert response.status_code == 302, response.status_code
+                transaction.set_rollback(True)
+        return post
+
+    def get_cases(self):
+        cases = [
+            'get_translations',
+            'get_translation',
+            'with_translations',
+            'get_languages',
+            'root_redirect',
+            'revisions_index',
+        ]
+        if self.untranslated:
+            cases += ['add_translation', 'add_translation_post']
+        return cases
+
+    def run_case(self, name):
+        factory = getattr(self, 'case_%s' % name)
+        results = {}
+        for mode in ('cold', 'warm'):
+            queries = []
+            times = []
+            for iteration in range(self.repeat):
+                for page_id in self.page_ids:
+                    func = factory(page_id)
+                    if mode == 'cold':
+                        clear_caches()
+                    else:
+                        func()
+                    count, duration = measure(func)
+                    queries.append(count)
+                    times.append(duration)
+            results[mode] = {
+                'queries': summarize(queries),
+                'time_ms': summarize(times),
+            }
+        return results
+
+
+def compare(results, baseline, max_time_regression):
+    """Return the regressions of `results` compared to `baseline`."""
+    regressions = []
+    for name, result in results['cases'].items():
+        if name not in baseline['cases']:
+            continue
+        for mode, values in result.items():
+            old = baseline['cases'][name][mode]
+            if values['queries']['median'] > old['queries']['median']:
+                regressions.append(
+                    "%s (%s): %d queries, was %d" % (
+                        name, mode, values['queries']['median'],
+                        old['queries']['median']))
+            limit = old['time_ms']['median'] * (1 + max_time_regression)
+            if values['time_ms']['median'] > limit:
+                regressions.append(
+                    "%s (%s): %.1f ms, was %.1f ms" % (
+                        name, mode, values['time_ms']['median'],
+                        old['time_ms']['median']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--languages', type=int, default=10)
+    parser.add_argument('--groups', type=int, default=2000)
+    parser.add_argument(
+        '--coverage', type=float, default=0.8,
+        help="Probability of a group to be translated into a language.")
+    parser.add_argument(
+        '--samples', type=int, default=20,
+        help="Number of pages every case is measured on.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cases', nargs='*', help="Cases to run.")
+    parser.add_argument('--output', help="File to write the results to.")
+    parser.add_argument(
+        '--baseline', help="Results of an earlier run to compare with.")
+    parser.add_argument(
+        '--max-time-regression', type=float, default=0.25,
+        help="Allowed relative increase of the median time.")
+    parser.add_argument(
+        '--reset', action='store_true',
+        help="Flush the database even if it is not the benchmark database.")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    import django
+    import wagtail
+    from django.db import connection
+
+    from .generate import generate
+
+    def progress(message):
+        if not args.quiet:
+            sys.stderr.write(message + '\n')
+
+    start = time.time()
+    try:
+        tree = generate(
+            languages=args.languages, groups=args.groups,
+            coverage=args.coverage, seed=args.seed, progress=progress,
+            reset=args.reset)
+    except ValueError as e:
+        parser.error(str(e))
+    generate_seconds = time.time() - start
+
+    benchmark = Benchmark(tree, args.samples, args.repeat, args.seed)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'wagtail': wagtail.__version__,
+            'database': connection.vendor,
+            'tree': tree,
+            'samples': len(benchmark.page_ids),
+            'repeat': args.repeat,
+            'generate_seconds': generate_seconds,
+        },
+        'cases': {},
+    }
+    for name in args.cases or benchmark.get_cases():
+        progress("Running %s" % name)
+        results['cases'][name] = benchmark.run_case(name)
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_time_regression)
+        for regression in regressions:
+            sys.stderr.write("Regression: %s\n" % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
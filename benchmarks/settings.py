@@ -0,0 +1,104 @@
+"""Django settings for running the benchmarks, see `benchmarks/run.py`."""
+import os
+import tempfile
+
+from django.conf.global_settings import LANGUAGES as ALL_LANGUAGES
+
+
+SECRET_KEY = 'benchmarks'
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+INSTALLED_APPS = [
+    'wagtail_page_translation',
+    'benchmarks',
+
+    'wagtail.wagtailforms',
+    'wagtail.wagtailredirects',
+    'wagtail.wagtailembeds',
+    'wagtail.wagtailsites',
+    'wagtail.wagtailusers',
+    'wagtail.wagtailsnippets',
+    'wagtail.wagtaildocs',
+    'wagtail.wagtailimages',
+    'wagtail.wagtailsearch',
+    'wagtail.wagtailadmin',
+    'wagtail.wagtailcore',
+
+    'modelcluster',
+    'taggit',
+
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'wagtail.wagtailcore.middleware.SiteMiddleware',
+]
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.template.context_processors.i18n',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+# The benchmarks flush the database, its name is never taken from the
+# shared PGDATABASE variable
+BENCHMARK_DATABASE_NAME = 'wagtail_page_translation_benchmarks'
+
+if os.environ.get('BENCHMARK_DATABASE') == 'postgres':
+    # Other connection parameters are taken from the usual PG* variables
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': os.environ.get(
+                'BENCHMARK_PGDATABASE', BENCHMARK_DATABASE_NAME),
+            'USER': os.environ.get('PGUSER', ''),
+            'PASSWORD': os.environ.get('PGPASSWORD', ''),
+            'HOST': os.environ.get('PGHOST', ''),
+            'PORT': os.environ.get('PGPORT', ''),
+        },
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'BENCHMARK_SQLITE_PATH',
+                os.path.join(tempfile.gettempdir(),
+                             BENCHMARK_DATABASE_NAME + '.sqlite3')),
+        },
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+LANGUAGE_CODE = 'en'
+LANGUAGES = ALL_LANGUAGES
+USE_I18N = True
+USE_TZ = True
+
+STATIC_URL = '/static/'
+WAGTAIL_SITE_NAME = 'Benchmarks'
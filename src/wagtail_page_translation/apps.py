@@ -6,3 +6,7 @@ class WagtailPageTranslationConfig(AppConfig):
 
     name = 'wagtail_page_translation'
     verbose_name = _("Wagtail Page Translation")
+
+    def ready(self):
+        from .signals import handlers
+        handlers.connect_page_receivers()
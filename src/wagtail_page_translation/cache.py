@@ -0,0 +1,283 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from .conf import get_setting
+
+
+KEY_PREFIX = 'wagtail_page_translation'
+
+_bulk = threading.local()
+
+
+def get_cache():
+    return caches[get_setting('CACHE_ALIAS')]
+
+
+def make_key(*parts):
+    return ':'.join([KEY_PREFIX] + [str(part) for part in parts])
+
+
+def new_stamp():
+    """Return a fresh version stamp (microseconds since the epoch)."""
+    return int(time.time() * 1000000)
+
+
+def get_stamps(names):
+    """Return the shared version stamps for `names` as a dict.
+
+    A missing stamp (never set, or evicted) is replaced by a fresh one,
+    so values cached under an older stamp can never be served again.
+    """
+    cache = get_cache()
+    keys = dict((make_key('stamp', name), name) for name in names)
+    found = cache.get_many(list(keys))
+
+    stamps = {}
+    for key, name in keys.items():
+        stamp = found.get(key)
+        if stamp is None:
+            stamp = new_stamp()
+            if not cache.add(key, stamp, None):
+                stamp = cache.get(key, stamp)
+        stamps[name] = stamp
+    return stamps
+
+
+def get_stamp(name):
+    """Return the shared version stamp for `name`."""
+    return get_stamps([name])[name]
+
+
+def bump_stamps(names):
+    """Replace the shared version stamps for `names` with fresh ones."""
+    stamp = new_stamp()
+    get_cache().set_many(
+        dict((make_key('stamp', name), stamp) for name in names), None)
+    return stamp
+
+
+def bump_stamp(name):
+    """Replace the shared version stamp for `name` with a fresh one."""
+    return bump_stamps([name])
+
+
+def invalidate_stamps(names):
+    """Bump the stamps for `names` once the current transaction commits."""
+    if in_bulk_invalidation():
+        # Replaced by a single invalidation at the end of `bulk_invalidation`
+        return
+    names = list(set(names))
+    if names:
+        transaction.on_commit(lambda: bump_stamps(names))
+
+
+def group_stamp_name(translation_key):
+    return 'group:%s' % translation_key
+
+
+def children_stamp_name(parent_path):
+    return 'children:%s' % parent_path
+
+
+# Bumped whenever URLs may change anywhere, e.g. when a page is moved
+TREE_STAMP_NAME = 'tree'
+
+
+def invalidate_translation_groups(translation_keys):
+    """Invalidate everything cached for the given translation groups."""
+    invalidate_stamps(group_stamp_name(key) for key in translation_keys)
+
+
+def invalidate_children(parent_paths):
+    """Invalidate everything cached for the children of the given pages."""
+    invalidate_stamps(children_stamp_name(path) for path in parent_paths)
+
+
+def invalidate_tree():
+    """Invalidate everything cached which depends on page URLs."""
+    invalidate_stamps([TREE_STAMP_NAME])
+
+
+def invalidate_all():
+    """Invalidate everything cached, in all processes.
+
+    All cached values depend on the tree or the languages stamp.
+    """
+    invalidate_tree()
+    language_registry.invalidate()
+
+
+def in_bulk_invalidation():
+    """Return whether the current thread is within `bulk_invalidation`."""
+    return bool(getattr(_bulk, 'depth', 0))
+
+
+@contextmanager
+def bulk_invalidation():
+    """Replace the invalidations within the block by a single one.
+
+    Bulk operations touch thousands of pages, bumping the stamps of every
+    translation group would cost a cache write each. Within the block all
+    invalidations are skipped, and everything is invalidated once at its
+    end instead.
+    """
+    _bulk.depth = getattr(_bulk, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _bulk.depth -= 1
+        if not _bulk.depth:
+            invalidate_all()
+
+
+class LRUCache(object):
+    """Thread safe mapping which keeps the `maxsize` most recent items."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LanguageState(object):
+    """Snapshot of the `Language` table as held by the registry."""
+
+    def __init__(self, languages):
+        self.all = list(languages)
+        self.live = [language for language in self.all if language.live]
+        self.by_id = dict((language.pk, language) for language in self.all)
+        self.by_code = {}
+        for language in self.all:
+            # Keep the first language per code, like `.filter().first()`
+            self.by_code.setdefault(language.code, language)
+        self.default = next(
+            (language for language in self.live if language.is_default),
+            None)
+
+        # Lower cased language tags of the live languages, a base tag
+        # (`pt`) matches its first variant (`pt-br`) when it is not a
+        # language of its own.
+        self.lookup = {}
+        for language in self.live:
+            self.lookup.setdefault(language.code.lower(), language)
+        for language in self.live:
+            base = language.code.lower().split('-')[0]
+            self.lookup.setdefault(base, language)
+        self.accept_language_cache = LRUCache(
+            get_setting('ACCEPT_LANGUAGE_CACHE_SIZE'))
+        # URLs of non-page views in the live languages, see
+        # `resolvers.get_view_translation_urls`.
+        self.view_url_cache = LRUCache(get_setting('VIEW_URL_CACHE_SIZE'))
+
+    def match(self, code):
+        """Return the live language best matching a language tag, if any.
+
+        A tag with a region (`pt-br`) falls back to its base language
+        (`pt`).
+        """
+        if not code:
+            return None
+        code = code.lower().replace('_', '-')
+        language = self.lookup.get(code)
+        if language is None:
+            language = self.lookup.get(code.split('-')[0])
+        return language
+
+    def match_accept_language(self, header):
+        """Return the live languages accepted by an `Accept-Language` header.
+
+        Results are memoized on the raw header string.
+        """
+        languages = self.accept_language_cache.get(header)
+        if languages is None:
+            languages = []
+            for code, quality in parse_accept_lang_header(header):
+                language = self.match(code)
+                if language is not None and language not in languages:
+                    languages.append(language)
+            languages = tuple(languages)
+            self.accept_language_cache.set(header, languages)
+        return languages
+
+
+class LanguageRegistry(object):
+    """Process-local cache of all languages.
+
+    The registry is rebuilt with a single query whenever the shared
+    `languages` version stamp changes. Every process checks the stamp at
+    most once per `WAGTAIL_PAGE_TRANSLATION_CACHE_CHECK_INTERVAL` seconds,
+    so all workers agree shortly after a language has been changed.
+    """
+
+    stamp_name = 'languages'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._stamp = None
+        self._checked_at = 0
+
+    def get_state(self):
+        state = self._state
+        now = time.time()
+        if (state is not None and
+                now - self._checked_at < get_setting('CACHE_CHECK_INTERVAL')):
+            return state
+
+        # Read the stamp before the table, so a change made while loading
+        # results in a newer stamp and therefore another rebuild.
+        stamp = get_stamp(self.stamp_name)
+        with self._lock:
+            if self._state is None or self._stamp != stamp:
+                model = apps.get_model('wagtail_page_translation', 'Language')
+                self._state = LanguageState(model._default_manager.all())
+                self._stamp = stamp
+            self._checked_at = now
+            return self._state
+
+    def clear(self):
+        """Drop the local state of this process only."""
+        with self._lock:
+            self._state = None
+            self._stamp = None
+
+    def invalidate(self):
+        """Invalidate the registry in every process."""
+        def _invalidate():
+            bump_stamp(self.stamp_name)
+            self.clear()
+        # Other processes must not rebuild from uncommitted data.
+        transaction.on_commit(_invalidate)
+
+
+language_registry = LanguageRegistry()
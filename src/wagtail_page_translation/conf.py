@@ -0,0 +1,40 @@
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Alias of the Django cache used for version stamps and shared caches.
+    'CACHE_ALIAS': 'default',
+    # Seconds a process trusts its in-memory caches before checking the
+    # shared version stamps again.
+    'CACHE_CHECK_INTERVAL': 1,
+    # Seconds shared data, like the URLs of translations, is cached.
+    # Cached values are invalidated on changes anyway.
+    'CACHE_TIMEOUT': 60 * 60 * 24,
+    # Seconds the `get_languages` tag caches its result per translation
+    # group, 0 disables the cache.
+    'LANGUAGE_SWITCHER_CACHE_TIMEOUT': 0,
+    # Number of distinct `Accept-Language` headers remembered per process.
+    'ACCEPT_LANGUAGE_CACHE_SIZE': 1000,
+    # Number of distinct views and arguments for which the URLs in all
+    # languages are remembered per process.
+    'VIEW_URL_CACHE_SIZE': 1000,
+    # Report timings and query counts of the translation hot paths to the
+    # stats backend and the `operation_measured` signal.
+    'INSTRUMENTATION': False,
+    # Queue translations made in the admin as `TranslationJob`s, which are
+    # processed by the `process_translation_jobs` management command.
+    'TRANSLATION_JOBS': False,
+    # Seconds the `next_since` of the changed groups API lies before the
+    # latest change, changes committed later than that after they were
+    # made may be missed by clients.
+    'API_SINCE_MARGIN': 300,
+    # Dotted path of the stats backend class used by the instrumentation.
+    'STATS_BACKEND':
+        'wagtail_page_translation.instrumentation.MemoryStatsBackend',
+}
+
+
+def get_setting(name):
+    """Return a `WAGTAIL_PAGE_TRANSLATION_<name>` setting or its default."""
+    return getattr(settings, 'WAGTAIL_PAGE_TRANSLATION_%s' % name,
+                   DEFAULTS[name])
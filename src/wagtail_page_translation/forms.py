@@ -4,11 +4,12 @@ from operator import itemgetter
 
 from django import forms
 from django.conf import settings
-from django.utils.translation import ugettext as _
+from django.utils.translation import ugettext as _, ungettext
 from wagtail.wagtailcore.models import Page
 from wagtail.wagtailadmin import widgets
 
 from .models import Language
+from .operations import is_within_subtree_translation
 
 
 class LanguageForm(forms.ModelForm):
@@ -38,11 +39,24 @@ class LanguageForm(forms.ModelForm):
         self.fields['code'].choices = sorted_choices
 
 
+class MoveLanguageForm(forms.Form):
+    """Choice of the language to move all pages of a language to."""
+
+    def __init__(self, *args, **kwargs):
+        language = kwargs.pop('language')
+        super(MoveLanguageForm, self).__init__(*args, **kwargs)
+        self.fields['target'] = forms.ModelChoiceField(
+            queryset=Language.objects.exclude(pk=language.pk),
+            label=_("Move pages to"))
+
+
 class AddTranslationForm(forms.Form):
     def __init__(self, *args, **kwargs):
         # CopyPage must be passed a 'page' kwarg indicating the page to be
         # copied
         self.page = kwargs.pop('page')
+        # Language of the translation, to check where subpages can go
+        self.language = kwargs.pop('language', None)
         can_publish = kwargs.pop('can_publish')
         parent_page = kwargs.pop('parent_page')
         super(AddTranslationForm, self).__init__(*args, **kwargs)
@@ -59,15 +73,17 @@ class AddTranslationForm(forms.Form):
             help_text=_("This copy will be a child of this given parent page.")
         )
 
-        # pages_to_copy = self.page.get_descendants(inclusive=True)
-        # subpage_count = pages_to_copy.count() - 1
-        # if subpage_count > 0:
-        #     self.fields['copy_subpages'] = forms.BooleanField(
-        #         required=False, initial=True, label=_("Copy subpages"),
-        #         help_text=ungettext(
-        #             "This will copy %(count)s subpage.",
-        #             "This will copy %(count)s subpages.",
-        #             subpage_count) % {'count': subpage_count})
+        pages_to_copy = self.page.get_descendants(inclusive=True)
+        subpage_count = pages_to_copy.count() - 1
+        if subpage_count > 0:
+            self.fields['copy_subpages'] = forms.BooleanField(
+                required=False, initial=False, label=_("Copy subpages"),
+                help_text=ungettext(
+                    "This will translate %(count)s subpage, existing "
+                    "translations are moved below the new page.",
+                    "This will translate %(count)s subpages, existing "
+                    "translations are moved below the new page.",
+                    subpage_count) % {'count': subpage_count})
 
         if can_publish:
             label = _("Publish copied page")
@@ -98,4 +114,21 @@ class AddTranslationForm(forms.Form):
             # The slug is no longer valid, hence remove it from cleaned_data
             del cleaned_data['new_slug']
 
+        # Make sure the subtree isn't copied into itself
+        if (cleaned_data.get('copy_subpages') and
+                parent_page.path.startswith(self.page.path)):
+            self._errors['new_parent_page'] = self.error_class(
+                [_("You cannot copy a page and its subpages into itself")])
+            del cleaned_data['new_parent_page']
+        # Existing translations of the subpages can't be moved into
+        # themselves either
+        elif (cleaned_data.get('copy_subpages') and
+                self.language is not None and
+                is_within_subtree_translation(
+                    self.page, self.language, parent_page)):
+            self._errors['new_parent_page'] = self.error_class(
+                [_("You cannot copy a page and its subpages into an existing "
+                   "translation of them")])
+            del cleaned_data['new_parent_page']
+
         return cleaned_data
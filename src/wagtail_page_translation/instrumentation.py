@@ -0,0 +1,213 @@
+"""Timers and query counters around the translation hot paths.
+
+Instrumentation is disabled by default. With
+`WAGTAIL_PAGE_TRANSLATION_INSTRUMENTATION` enabled, every measured
+operation is reported to the configured stats backend and the
+`operation_measured` signal is sent. `ServerTimingMiddleware` additionally
+reports the operations of a request in a `Server-Timing` header.
+
+Queries are counted by wrapping the cursors the connections create while
+an operation is measured, queries are neither logged nor kept.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .signals import operation_measured
+
+
+_active = threading.local()
+
+
+class BaseStatsBackend(object):
+    """Interface of stats backends, modelled after statsd clients.
+
+    The base class discards all measurements.
+    """
+
+    def incr(self, name, count=1):
+        pass
+
+    def timing(self, name, milliseconds):
+        pass
+
+
+class MemoryStatsBackend(BaseStatsBackend):
+    """Keep counters and timings in memory of the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def incr(self, name, count=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def timing(self, name, milliseconds):
+        with self._lock:
+            calls, total, maximum = self.timings.get(name, (0, 0.0, 0.0))
+            self.timings[name] = (
+                calls + 1, total + milliseconds, max(maximum, milliseconds))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_stats_backend():
+    """Return the stats backend configured by `STATS_BACKEND`."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(get_setting('STATS_BACKEND'))()
+    return _backend
+
+
+def get_server_timings():
+    """Return the measurements collected for the current request, if any."""
+    return getattr(_active, 'timings', None)
+
+
+def activate_server_timings():
+    _active.timings = []
+    return _active.timings
+
+
+def deactivate_server_timings():
+    _active.timings = None
+
+
+class QueryCounter(object):
+    """Count the queries of the cursors made by a connection.
+
+    While active, the cursor factories of the connection are replaced by
+    ones wrapping every cursor in a `CountingCursor`. Counters can be
+    nested, the queries are then counted by each of them.
+    """
+
+    FACTORIES = ['make_cursor', 'make_debug_cursor']
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.count = 0
+        self.replaced = {}
+
+    def activate(self):
+        for name in self.FACTORIES:
+            # Only set on the instance by an enclosing counter
+            self.replaced[name] = self.connection.__dict__.get(name)
+            factory = getattr(self.connection, name)
+            setattr(self.connection, name, self.wrap_factory(factory))
+
+    def deactivate(self):
+        for name, factory in self.replaced.items():
+            if factory is None:
+                delattr(self.connection, name)
+            else:
+                setattr(self.connection, name, factory)
+
+    def wrap_factory(self, factory):
+        def make_cursor(cursor):
+            return CountingCursor(factory(cursor), self)
+        return make_cursor
+
+
+class CountingCursor(object):
+    """Cursor wrapper counting the executed queries."""
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.cursor.__exit__(exc_type, exc_value, traceback)
+
+    def execute(self, *args, **kwargs):
+        self.counter.count += 1
+        return self.cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.counter.count += 1
+        return self.cursor.executemany(*args, **kwargs)
+
+    def callproc(self, *args, **kwargs):
+        self.counter.count += 1
+        return self.cursor.callproc(*args, **kwargs)
+
+
+class measure(object):
+    """Measure the wall time and number of queries of an operation.
+
+    Can be used as a context manager or as a decorator::
+
+        with measure('serve'):
+            ...
+
+    Nothing is measured unless instrumentation is enabled or a
+    `Server-Timing` header is being collected for the current request.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            with measure(self.name):
+                return func(*args, **kwargs)
+        return inner
+
+    def __enter__(self):
+        self.enabled = (get_setting('INSTRUMENTATION') or
+                        get_server_timings() is not None)
+        if not self.enabled:
+            return self
+
+        # Unlike a debug cursor, counting doesn't log or keep the queries
+        self.counters = [
+            QueryCounter(connection) for connection in connections.all()]
+        for counter in self.counters:
+            counter.activate()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.enabled:
+            return
+        duration = (time.time() - self.start) * 1000
+        for counter in reversed(self.counters):
+            counter.deactivate()
+        queries = sum(counter.count for counter in self.counters)
+
+        if get_setting('INSTRUMENTATION'):
+            backend = get_stats_backend()
+            backend.incr('%s.calls' % self.name)
+            backend.incr('%s.queries' % self.name, queries)
+            backend.timing('%s.time' % self.name, duration)
+            operation_measured.send(
+                sender=None, name=self.name, duration=duration,
+                queries=queries)
+
+        timings = get_server_timings()
+        if timings is not None:
+            timings.append((self.name, duration, queries))
@@ -0,0 +1,179 @@
+"""Database backed queue of translation jobs.
+
+No broker is needed: jobs are rows of `TranslationJob`, claimed by the
+workers with a conditional update, so several workers can share a queue.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import TranslationJob
+from .operations import translate_subtree
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_translation(page, language, parent, user=None, title=None,
+                        slug=None, copy_subpages=False, keep_live=False):
+    """Queue the translation of `page` into `language`.
+
+    :param page: TranslatablePage instance to translate
+    :param language: Language instance to translate into
+    :param parent: page which receives the translation
+    :param user: owner of the new pages
+    :param title: title of the translation, defaults to the page title
+    :param slug: slug of the translation, defaults to the page slug
+    :param copy_subpages: Boolean to translate all descendants as well
+    :param keep_live: Boolean to publish copies of live pages
+    :return: TranslationJob instance
+
+    """
+    return TranslationJob.objects.create(
+        page=page,
+        language=language,
+        parent=parent,
+        user=user,
+        title=title or page.title,
+        slug=slug or page.slug,
+        copy_subpages=copy_subpages,
+        keep_live=keep_live,
+    )
+
+
+def claim_next_job():
+    """Mark the oldest pending job as running and return it.
+
+    :return: TranslationJob instance, or None if no job is pending
+
+    """
+    while True:
+        job = (
+            TranslationJob.objects
+            .filter(status=TranslationJob.STATUS_PENDING)
+            .order_by('created_at', 'pk')
+            .first())
+        if job is None:
+            return None
+
+        started_at = timezone.now()
+        claimed = (
+            TranslationJob.objects
+            .filter(pk=job.pk, status=TranslationJob.STATUS_PENDING)
+            .update(status=TranslationJob.STATUS_RUNNING,
+                    started_at=started_at))
+        if claimed:
+            job.status = TranslationJob.STATUS_RUNNING
+            job.started_at = started_at
+            return job
+        # Another worker claimed the job first, try the next one
+
+
+def run_job(job):
+    """Translate the page of a claimed job and record the outcome."""
+    def progress(done, total):
+        job.pages_done = done
+        job.pages_total = total
+        TranslationJob.objects.filter(pk=job.pk).update(
+            pages_done=done, pages_total=total)
+
+    try:
+        if job.copy_subpages:
+            stats = translate_subtree(
+                job.page, job.language, job.parent,
+                user=job.user,
+                keep_live=job.keep_live,
+                root_attrs={'title': job.title, 'slug': job.slug},
+                progress=progress)
+            job.message = (
+                "{created} pages created, {moved} moved, {skipped} "
+                "skipped.".format(**stats))
+        else:
+            progress(0, 1)
+            with transaction.atomic():
+                job.page.copy(
+                    to=job.parent,
+                    update_attrs={
+                        'title': job.title,
+                        'slug': job.slug,
+                        'language': job.language,
+                    },
+                    keep_live=job.keep_live,
+                    user=job.user,
+                )
+            progress(1, 1)
+            job.message = ''
+    except Exception as e:
+        logger.exception("Translation job %s failed", job.pk)
+        job.status = TranslationJob.STATUS_FAILED
+        job.message = str(e)
+    else:
+        job.status = TranslationJob.STATUS_DONE
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'status', 'message', 'pages_done', 'pages_total', 'finished_at'])
+    return job
+
+
+def requeue_running_jobs():
+    """Reset running jobs to pending, e.g. after a worker was killed.
+
+    :return: number of requeued jobs
+
+    """
+    return (
+        TranslationJob.objects
+        .filter(status=TranslationJob.STATUS_RUNNING)
+        .update(status=TranslationJob.STATUS_PENDING, started_at=None,
+                pages_done=0))
+
+
+def process_jobs(concurrency=1, limit=None):
+    """Run pending jobs until the queue is empty.
+
+    With a `concurrency` of 1 the jobs run in the calling thread, otherwise
+    in a pool of `concurrency` threads with a database connection each.
+
+    :param concurrency: number of jobs run at the same time
+    :param limit: maximum number of jobs to run, None for no limit
+    :return: list of the processed TranslationJob instances
+
+    """
+    lock = threading.Lock()
+    processed = []
+
+    def claim():
+        with lock:
+            if limit is not None and len(processed) >= limit:
+                return None
+            job = claim_next_job()
+            if job is not None:
+                processed.append(job)
+            return job
+
+    def work():
+        job = claim()
+        while job is not None:
+            run_job(job)
+            job = claim()
+
+    if concurrency <= 1:
+        work()
+        return processed
+
+    def work_in_thread():
+        try:
+            work()
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(work_in_thread) for i in range(concurrency)]
+        for future in futures:
+            future.result()
+    return processed
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Language
+from ...operations import (
+    delete_language, move_language, publish_language, unpublish_language)
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish, unpublish, move or delete all pages of a language. "
+        "Publishing and unpublishing also take the language live or "
+        "offline, deleting also deletes the language.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action', choices=['publish', 'unpublish', 'move', 'delete'])
+        parser.add_argument('language_code')
+        parser.add_argument(
+            '--to', dest='target_code',
+            help="Code of the language to move the pages to.")
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=500,
+            help="Number of pages handled per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            language = Language.objects.get_by_code(options['language_code'])
+            target = None
+            if options['action'] == 'move':
+                if not options['target_code']:
+                    raise CommandError("Moving pages requires --to.")
+                target = Language.objects.get_by_code(options['target_code'])
+        except Language.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        def progress(done, total):
+            if options['verbosity'] > 0:
+                self.stdout.write("%d/%d pages" % (done, total))
+
+        kwargs = {'chunk_size': options['chunk_size'], 'progress': progress}
+        try:
+            if options['action'] == 'publish':
+                count = publish_language(language, **kwargs)
+                self.stdout.write("%d pages published" % count)
+            elif options['action'] == 'unpublish':
+                count = unpublish_language(language, **kwargs)
+                self.stdout.write("%d pages unpublished" % count)
+            elif options['action'] == 'move':
+                stats = move_language(language, target, **kwargs)
+                self.stdout.write(
+                    "%(moved)d pages moved, %(skipped)d skipped" % stats)
+            else:
+                count = delete_language(language, **kwargs)
+                self.stdout.write("%d pages deleted" % count)
+        except ValueError as e:
+            raise CommandError(str(e))
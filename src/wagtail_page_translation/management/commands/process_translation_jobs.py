@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...jobs import process_jobs, requeue_running_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued translation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help="Number of jobs processed at the same time. SQLite does "
+                 "not support concurrent writes, keep the default of 1.")
+        parser.add_argument(
+            '--once', action='store_true', dest='once',
+            help="Exit when the queue is empty instead of waiting for new "
+                 "jobs.")
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help="Seconds to wait before checking an empty queue again.")
+        parser.add_argument(
+            '--requeue-running', action='store_true', dest='requeue_running',
+            help="Restart jobs left running by a stopped worker. Only use "
+                 "this when no other worker is running.")
+
+    def handle(self, *args, **options):
+        if options['requeue_running']:
+            count = requeue_running_jobs()
+            if options['verbosity'] > 0:
+                self.stdout.write("%d running jobs requeued" % count)
+
+        while True:
+            for job in process_jobs(concurrency=options['concurrency']):
+                if options['verbosity'] > 0:
+                    self.stdout.write("Job %d: %s %s" % (
+                        job.pk, job.get_status_display(), job.message))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ...members import rebuild_members
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the denormalized translation group members of all "
+        "translatable pages.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=1000,
+            help="Number of pages handled per transaction.")
+
+    def handle(self, *args, **options):
+        count = rebuild_members(chunk_size=options['chunk_size'])
+        if options['verbosity'] > 0:
+            self.stdout.write("%d members rebuilt" % count)
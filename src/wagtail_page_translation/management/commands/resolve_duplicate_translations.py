@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ...operations import resolve_duplicate_translations
+
+
+class Command(BaseCommand):
+    help = (
+        "Give a new translation key to pages which share their translation "
+        "key and language with another page, keeping the live or newest "
+        "one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, dest='batch_size', default=500,
+            help="Number of duplicate groups resolved per query.")
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run',
+            help="Only report the duplicates.")
+
+    def handle(self, *args, **options):
+        stats = resolve_duplicate_translations(
+            batch_size=options['batch_size'], dry_run=options['dry_run'])
+        self.stdout.write(
+            "%(groups)d duplicate groups, %(pages)d pages with a new "
+            "translation key" % stats)
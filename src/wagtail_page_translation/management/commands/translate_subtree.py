@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from wagtail.wagtailcore.models import Page
+
+from ...models import Language, TranslatablePage
+from ...operations import translate_subtree
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update the translation of a page and all its "
+        "descendants in the given language.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('page_id', type=int)
+        parser.add_argument('language_code')
+        parser.add_argument(
+            '--parent', type=int, dest='parent_id',
+            help="Id of the parent page of the translation. Defaults to the "
+                 "translation of the parent of the source page.")
+        parser.add_argument(
+            '--user', dest='username',
+            help="Username of the owner of the new pages.")
+        parser.add_argument(
+            '--unpublished', action='store_true', dest='unpublished',
+            help="Create all new pages as drafts.")
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=100,
+            help="Number of pages handled per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            page = TranslatablePage.objects.get(pk=options['page_id'])
+            language = Language.objects.get_by_code(options['language_code'])
+        except (TranslatablePage.DoesNotExist, Language.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        if options['parent_id']:
+            try:
+                parent = Page.objects.get(pk=options['parent_id'])
+            except Page.DoesNotExist:
+                raise CommandError(
+                    "Page %d does not exist." % options['parent_id'])
+        else:
+            parent = page.get_translation_parent(language)
+            if parent is None:
+                raise CommandError(
+                    "The parent page has no translation in '%s', use "
+                    "--parent." % language.code)
+
+        user = None
+        if options['username']:
+            user_model = get_user_model()
+            try:
+                user = user_model._default_manager.get_by_natural_key(
+                    options['username'])
+            except user_model.DoesNotExist:
+                raise CommandError(
+                    "User '%s' does not exist." % options['username'])
+
+        def progress(done, total):
+            if options['verbosity'] > 0:
+                self.stdout.write("%d/%d pages" % (done, total))
+
+        try:
+            stats = translate_subtree(
+                page, language, parent,
+                user=user,
+                keep_live=not options['unpublished'],
+                chunk_size=options['chunk_size'],
+                progress=progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            "%(created)d created, %(moved)d moved, %(unchanged)d unchanged, "
+            "%(skipped)d skipped" % stats)
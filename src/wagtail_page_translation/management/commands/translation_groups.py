@@ -0,0 +1,172 @@
+import json
+import sys
+import uuid
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, models, transaction
+
+from ...cache import invalidate_children, invalidate_translation_groups
+from ...members import rebuild_members
+from ...models import Language, TranslatablePage
+from ...utils import iterate_in_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the translation metadata of all translatable pages as JSON "
+        "lines, or import translation key and language changes from such "
+        "a file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=['export', 'import'])
+        parser.add_argument(
+            'file', nargs='?', default='-',
+            help="File to write to or read from, defaults to stdout/stdin.")
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=2000,
+            help="Number of pages read or updated per query.")
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run',
+            help="Only report the number of changes an import would make.")
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'export':
+            if options['file'] == '-':
+                self.export(self.stdout, options['chunk_size'])
+            else:
+                with open(options['file'], 'w') as output:
+                    self.export(output, options['chunk_size'])
+        else:
+            if options['file'] == '-':
+                stats = self.import_(
+                    sys.stdin, options['chunk_size'], options['dry_run'])
+            else:
+                with open(options['file']) as input_:
+                    stats = self.import_(
+                        input_, options['chunk_size'], options['dry_run'])
+            self.stderr.write(
+                "%(read)d pages read, %(changed)d changed, %(missing)d "
+                "missing" % stats)
+
+    def export(self, output, chunk_size):
+        codes = dict(
+            (language.pk, language.code)
+            for language in Language.objects.all_languages())
+        rows = TranslatablePage.objects.values_list(
+            'pk', 'url_path', 'translation_key', 'language_id', 'live')
+        for chunk in iterate_in_chunks(rows, chunk_size):
+            for pk, url_path, translation_key, language_id, live in chunk:
+                output.write(json.dumps({
+                    'id': pk,
+                    'url_path': url_path,
+                    'translation_key': str(translation_key),
+                    'language': codes.get(language_id),
+                    'live': live,
+                }, sort_keys=True) + '\n')
+
+    def import_(self, input_, chunk_size, dry_run):
+        stats = {'read': 0, 'changed': 0, 'missing': 0}
+        batch = {}
+        for line_number, line in enumerate(input_, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+                pk = int(data['id'])
+                translation_key = uuid.UUID(data['translation_key'])
+                language = Language.objects.get_by_code(data['language'])
+            except (ValueError, KeyError, TypeError,
+                    Language.DoesNotExist) as e:
+                raise CommandError("Line %d: %s" % (line_number, e))
+
+            batch[pk] = (translation_key, language.pk)
+            stats['read'] += 1
+            if len(batch) >= chunk_size:
+                self.apply(batch, stats, dry_run)
+                batch = {}
+        self.apply(batch, stats, dry_run)
+        return stats
+
+    def apply(self, batch, stats, dry_run):
+        """Update the pages of `batch` which changed with one query."""
+        if not batch:
+            return
+
+        current = list(
+            TranslatablePage.objects.filter(pk__in=list(batch))
+            .values_list('pk', 'translation_key', 'language_id', 'path'))
+        changes = {}
+        translation_keys = set()
+        parent_paths = set()
+        for pk, translation_key, language_id, path in current:
+            if batch[pk] != (translation_key, language_id):
+                changes[pk] = batch[pk]
+                translation_keys.update([translation_key, batch[pk][0]])
+                parent_paths.add(path[:-TranslatablePage.steplen])
+        stats['missing'] += len(batch) - len(current)
+        stats['changed'] += len(changes)
+        if not changes:
+            return
+        self.check_conflicts(batch, [row[0] for row in current], changes)
+        if dry_run:
+            return
+
+        try:
+            self.update(changes, translation_keys, parent_paths)
+        except IntegrityError as e:
+            # Like pages swapping their translation keys, the unique
+            # constraint is checked for each updated row
+            raise CommandError("Pages %s could not be updated: %s" % (
+                ', '.join(map(str, sorted(changes))), e))
+
+    def check_conflicts(self, batch, pks, changes):
+        """Raise CommandError if pages would share a key and language.
+
+        Pages of the batch may not get the same translation key and
+        language as each other, nor as a page outside of the batch.
+        """
+        pages = defaultdict(list)
+        for pk in pks:
+            pages[batch[pk]].append(pk)
+        new_pairs = set(changes.values())
+        for pk, translation_key, language_id in (
+                TranslatablePage.objects
+                .filter(translation_key__in=set(
+                    key for key, _ in new_pairs))
+                .exclude(pk__in=list(batch))
+                .values_list('pk', 'translation_key', 'language_id')):
+            if (translation_key, language_id) in new_pairs:
+                pages[(translation_key, language_id)].append(pk)
+
+        errors = []
+        for pair, pair_pks in sorted(
+                pages.items(), key=lambda item: min(item[1])):
+            if pair in new_pairs and len(pair_pks) > 1:
+                translation_key, language_id = pair
+                errors.append(
+                    "Pages %s would have translation key %s in language "
+                    "%s." % (
+                        ', '.join(map(str, sorted(pair_pks))),
+                        translation_key,
+                        Language.objects.get_by_id(language_id).code))
+        if errors:
+            raise CommandError(' '.join(errors))
+
+    def update(self, changes, translation_keys, parent_paths):
+        with transaction.atomic():
+            TranslatablePage.objects.filter(pk__in=list(changes)).update(
+                translation_key=models.Case(
+                    *[models.When(pk=pk, then=models.Value(
+                        key, output_field=models.UUIDField()))
+                      for pk, (key, language_id) in changes.items()],
+                    output_field=models.UUIDField()),
+                language_id=models.Case(
+                    *[models.When(pk=pk, then=models.Value(language_id))
+                      for pk, (key, language_id) in changes.items()],
+                    output_field=models.IntegerField()))
+            rebuild_members(
+                TranslatablePage.objects.filter(pk__in=list(changes)))
+            invalidate_translation_groups(translation_keys)
+            invalidate_children(parent_paths)
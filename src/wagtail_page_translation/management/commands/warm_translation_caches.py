@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from ...warming import warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-populate the caches of the language switcher, the hreflang "
+        "alternates and the root page redirects for all translation "
+        "groups.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=500,
+            help="Number of translation groups warmed at once.")
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help="Number of chunks warmed at the same time.")
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help="Maximum number of translation groups warmed per second.")
+
+    def handle(self, *args, **options):
+        def progress(groups, seconds):
+            if options['verbosity'] > 1:
+                self.stdout.write("%d groups, %.1f groups/s" % (
+                    groups, groups / seconds if seconds else 0))
+
+        stats = warm_caches(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            rate=options['rate'],
+            progress=progress)
+
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                "%(groups)d groups and %(index_pages)d index pages warmed "
+                "in %(seconds).1f s, %(groups_per_second).1f groups/s" % stats)
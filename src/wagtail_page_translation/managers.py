@@ -1,8 +1,18 @@
+from django.apps import apps
 from django.db import models
 
+from wagtail.wagtailcore.models import PageManager
+from wagtail.wagtailcore.query import PageQuerySet
+
+from .cache import language_registry
+
 
 class LanguageManager(models.Manager):
-    """Custom manager for the `Language` model."""
+    """Custom manager for the `Language` model.
+
+    Methods other than `live` are served from the process-local language
+    registry and do not hit the database once it has been loaded.
+    """
 
     def live(self):
         """Return all the live languages."""
@@ -10,4 +20,186 @@ class LanguageManager(models.Manager):
 
     def default(self):
         """Return the first choice of default languages."""
-        return self.live().filter(is_default=True).first()
+        return language_registry.get_state().default
+
+    def all_languages(self):
+        """Return a list of all languages, ordered by their position."""
+        return list(language_registry.get_state().all)
+
+    def live_languages(self):
+        """Return a list of the live languages, ordered by their position."""
+        return list(language_registry.get_state().live)
+
+    def get_by_code(self, code):
+        """Return the language for `code`.
+
+        :raises Language.DoesNotExist: if no such language exists.
+        """
+        try:
+            return language_registry.get_state().by_code[code]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                "Language with code %r does not exist." % code)
+
+    def get_by_id(self, pk):
+        """Return the language with primary key `pk`.
+
+        :raises Language.DoesNotExist: if no such language exists.
+        """
+        try:
+            return language_registry.get_state().by_id[pk]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                "Language with id %r does not exist." % pk)
+
+
+class TranslatablePageQuerySet(PageQuerySet):
+    """Custom queryset for `TranslatablePage` and its subclasses."""
+
+    # (language ids or None for all languages, specific) when the
+    # translations of the results should be prefetched
+    _translations_prefetch = None
+
+    # Fields loaded by `listing`, enough to link to the pages, and
+    # `last_published_at` on the Wagtail versions which have it
+    listing_fields = [
+        'id', 'title', 'slug', 'url_path', 'live', 'content_type',
+        'translation_key', 'language', 'first_published_at',
+    ]
+
+    def in_language(self, language, within=None, inclusive=False):
+        """Filter the pages of a language, optionally within a subtree.
+
+        The filter uses the translation group members and their
+        (language, url_path) index, across all page types. The subtree is
+        a `LIKE 'prefix%'` lookup, the index has the `text_pattern_ops`
+        operator class on PostgreSQL for it, and a 255 character prefix
+        on MySQL.
+
+        :param language: Language instance or language code
+        :param within: optional Page instance to limit the result to its
+            descendants
+        :param inclusive: Boolean to include `within` itself
+        :return: TranslatablePageQuerySet
+        :raises Language.DoesNotExist: if no language has the given code
+
+        """
+        if not hasattr(language, 'pk'):
+            language = apps.get_model(
+                'wagtail_page_translation', 'Language'
+            ).objects.get_by_code(language)
+
+        clone = self.filter(translation_member__language_id=language.pk)
+        if within is not None:
+            clone = clone.filter(
+                translation_member__url_path__startswith=within.url_path)
+            if not inclusive:
+                clone = clone.exclude(pk=within.pk)
+        return clone
+
+    def stale(self):
+        """Filter the translations whose source page changed since they
+        were last published.
+
+        :return: TranslatablePageQuerySet
+
+        """
+        return self.filter(translation_source__changed_at__isnull=False)
+
+    def listing(self):
+        """Load only the fields needed to list and link to the pages.
+
+        The generic pages are returned with all other fields deferred, in
+        a single query whatever the page types. Use `values` on top of it
+        for plain rows.
+
+        :return: TranslatablePageQuerySet
+
+        """
+        fields = list(self.listing_fields)
+        if hasattr(self.model, 'last_published_at'):
+            fields.append('last_published_at')
+        return self.only(*fields)
+
+    def after(self, url_path=None, size=100):
+        """Return a slice of the pages for keyset pagination.
+
+        Pages are ordered by their URL path, the next slice starts after
+        the `url_path` of the last page of the previous one. Unlike
+        offsets, late slices are as cheap as the first one.
+
+        :param url_path: `url_path` of the last page of the previous
+            slice, None for the first slice
+        :param size: maximum number of pages in the slice
+        :return: sliced TranslatablePageQuerySet
+
+        """
+        clone = self.order_by('translation_member__url_path')
+        if url_path is not None:
+            clone = clone.filter(translation_member__url_path__gt=url_path)
+        return clone[:size]
+
+    def with_translations(self, languages=None, specific=False):
+        """Prefetch the translations of all pages in the result.
+
+        The translations of all result pages are fetched with a single
+        query once the queryset is evaluated, `get_translations`,
+        `has_translation` and `get_translation` of the result pages then
+        no longer hit the database.
+
+        :param languages: optional iterable of Language instances to limit
+            the prefetched translations to
+        :param specific: Boolean to prefetch specific page instances, this
+            costs one extra query per page type. `get_translation` always
+            returns specific pages, it loads each generic page it returns
+            with a query of its own.
+        :return: TranslatablePageQuerySet
+
+        """
+        clone = self._clone()
+        language_ids = None
+        if languages is not None:
+            language_ids = frozenset(language.pk for language in languages)
+        clone._translations_prefetch = (language_ids, specific)
+        return clone
+
+    def _clone(self, *args, **kwargs):
+        clone = super(TranslatablePageQuerySet, self)._clone(*args, **kwargs)
+        clone._translations_prefetch = self._translations_prefetch
+        return clone
+
+    def _fetch_all(self):
+        prefetch = self._result_cache is None
+        super(TranslatablePageQuerySet, self)._fetch_all()
+        if prefetch and self._translations_prefetch is not None:
+            self._prefetch_translations(self._result_cache)
+
+    def _prefetch_translations(self, results):
+        model = apps.get_model('wagtail_page_translation', 'TranslatablePage')
+        # Results can be dicts or tuples with `values()`
+        pages = [page for page in results if isinstance(page, model)]
+        if not pages:
+            return
+
+        language_ids, specific = self._translations_prefetch
+        translations = model.objects.filter(
+            translation_key__in=set(page.translation_key for page in pages))
+        if language_ids is not None:
+            translations = translations.filter(language_id__in=language_ids)
+        if specific:
+            translations = translations.specific()
+
+        groups = dict(
+            (page.translation_key, {}) for page in pages)
+        for translation in translations:
+            groups[translation.translation_key][
+                translation.language_id] = translation
+
+        for page in pages:
+            page._prefetched_translations = groups[page.translation_key]
+            page._prefetched_translation_languages = language_ids
+
+
+class TranslatablePageManager(PageManager.from_queryset(
+        TranslatablePageQuerySet)):
+    """Custom manager for the `TranslatablePage` model."""
@@ -0,0 +1,111 @@
+"""Maintenance of the denormalized `TranslationGroupMember` table.
+
+Page saves, moves and deletes update the table through the signal
+handlers. Bulk operations which bypass the signals, like inserting or
+updating pages with querysets, update it with these functions.
+"""
+from django.db import models, transaction
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from .models import (
+    DeletedTranslationGroup, Language, TranslatablePage,
+    TranslationGroupMember)
+from .utils import iterate_in_chunks
+
+
+MEMBER_FIELDS = [
+    'translation_key', 'language_id', 'url_path', 'live', 'content_type_id']
+
+
+def get_language_order(language_id):
+    try:
+        return Language.objects.get_by_id(language_id).order
+    except Language.DoesNotExist:
+        return Language.objects.filter(pk=language_id).values_list(
+            'order', flat=True).first() or 0
+
+
+def build_member(page):
+    """Return an unsaved `TranslationGroupMember` for a page instance."""
+    return TranslationGroupMember(
+        page_id=page.pk,
+        language_order=get_language_order(page.language_id),
+        **dict((name, getattr(page, name)) for name in MEMBER_FIELDS))
+
+
+def save_members(pages):
+    """Create or update the members of page instances."""
+    for page in pages:
+        build_member(page).save()
+
+
+def insert_members(pages):
+    """Insert the members of new page instances in bulk."""
+    TranslationGroupMember.objects.bulk_create(
+        [build_member(page) for page in pages])
+
+
+def rebuild_members(queryset=None, chunk_size=1000):
+    """Recreate the members of the pages in a queryset from the database.
+
+    :param queryset: TranslatablePage queryset, None for all pages
+    :param chunk_size: number of pages handled per transaction
+    :return: number of members created
+
+    """
+    if queryset is None:
+        queryset = TranslatablePage.objects.all()
+        TranslationGroupMember.objects.exclude(
+            page_id__in=queryset.values('pk')).delete()
+
+    rows = queryset.values_list(
+        'pk', 'language__order', *MEMBER_FIELDS)
+    count = 0
+    for chunk in iterate_in_chunks(rows, chunk_size):
+        with transaction.atomic():
+            TranslationGroupMember.objects.filter(
+                page_id__in=[row[0] for row in chunk]).delete()
+            TranslationGroupMember.objects.bulk_create([
+                TranslationGroupMember(
+                    page_id=row[0], language_order=row[1],
+                    **dict(zip(MEMBER_FIELDS, row[2:])))
+                for row in chunk])
+        count += len(chunk)
+    return count
+
+
+def move_members(old_url_path, new_url_path):
+    """Update the URL paths of the members below a moved page."""
+    TranslationGroupMember.objects.filter(
+        url_path__startswith=old_url_path).update(
+        url_path=Concat(
+            models.Value(new_url_path),
+            Substr('url_path', len(old_url_path) + 1),
+            output_field=models.TextField()),
+        modified_at=timezone.now())
+
+
+def update_language(language):
+    """Copy the position of a language to its members, and mark them as
+    modified, as the language may have been taken live or offline."""
+    TranslationGroupMember.objects.filter(language=language).update(
+        language_order=language.order, modified_at=timezone.now())
+
+
+def touch_groups(translation_keys):
+    """Mark all members of translation groups as modified.
+
+    Groups without any member left, as their last page was deleted, get a
+    `DeletedTranslationGroup` marker instead.
+    """
+    translation_keys = set(translation_keys)
+    now = timezone.now()
+    members = TranslationGroupMember.objects.filter(
+        translation_key__in=translation_keys)
+    members.update(modified_at=now)
+    deleted = translation_keys.difference(
+        members.values_list('translation_key', flat=True).distinct())
+    for translation_key in deleted:
+        DeletedTranslationGroup.objects.update_or_create(
+            translation_key=translation_key, defaults={'deleted_at': now})
@@ -0,0 +1,71 @@
+"""Request scoped memo of translation groups.
+
+`TranslationMemoMiddleware` activates a `TranslationMemo` for every
+request. While it is active, `TranslatablePage.get_translations`,
+`has_translation` and `get_translation` load the whole translation group
+of a page with a single query the first time it is touched, and answer
+all further lookups for that group from memory.
+"""
+import threading
+
+from django.apps import apps
+
+
+_active = threading.local()
+
+
+class TranslationMemo(object):
+    """Translation groups loaded during a request.
+
+    `hits` and `misses` count the group lookups answered from memory and
+    the ones which needed a query.
+    """
+
+    def __init__(self):
+        self.groups = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_group(self, translation_key):
+        """Return the pages of a translation group.
+
+        :param translation_key: translation key of the group
+        :return: dict of language id to TranslatablePage instance
+
+        """
+        group = self.groups.get(translation_key)
+        if group is not None:
+            self.hits += 1
+            return group
+
+        self.misses += 1
+        model = apps.get_model('wagtail_page_translation', 'TranslatablePage')
+        group = dict(
+            (page.language_id, page)
+            for page in model.objects.filter(translation_key=translation_key))
+        self.groups[translation_key] = group
+        return group
+
+    def clear(self):
+        """Forget all loaded groups, e.g. when a page has been saved."""
+        self.groups.clear()
+
+    def __str__(self):
+        return 'hits=%d, misses=%d, groups=%d' % (
+            self.hits, self.misses, len(self.groups))
+
+
+def get_memo():
+    """Return the active `TranslationMemo` of this thread, if any."""
+    return getattr(_active, 'memo', None)
+
+
+def activate_memo():
+    """Activate and return a new `TranslationMemo` for this thread."""
+    _active.memo = TranslationMemo()
+    return _active.memo
+
+
+def deactivate_memo():
+    """Deactivate the `TranslationMemo` of this thread."""
+    _active.memo = None
@@ -0,0 +1,57 @@
+from django.conf import settings
+
+from .instrumentation import (
+    activate_server_timings, deactivate_server_timings)
+from .memo import activate_memo, deactivate_memo
+
+
+class TranslationMemoMiddleware(object):
+    """Memoize translation lookups for the duration of a request.
+
+    With `DEBUG` enabled, the number of memo hits and misses is added to
+    the response in an `X-Translation-Memo` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        memo = activate_memo()
+        try:
+            response = self.get_response(request)
+        finally:
+            deactivate_memo()
+        if settings.DEBUG:
+            response['X-Translation-Memo'] = str(memo)
+        return response
+
+
+def format_server_timing(name, duration, queries):
+    """Return a metric of the `Server-Timing` header."""
+    if queries is None:
+        return '%s;dur=%.1f' % (name, duration)
+    return '%s;dur=%.1f;desc="%d queries"' % (name, duration, queries)
+
+
+class ServerTimingMiddleware(object):
+    """Report measured translation operations in a `Server-Timing` header.
+
+    Only active with `DEBUG` enabled, as timings reveal internals.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DEBUG:
+            return self.get_response(request)
+
+        timings = activate_server_timings()
+        try:
+            response = self.get_response(request)
+        finally:
+            deactivate_server_timings()
+        if timings:
+            response['Server-Timing'] = ', '.join(
+                format_server_timing(*timing) for timing in timings)
+        return response
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import uuid
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+
+def resolve_duplicates(apps, schema_editor):
+    """Leave at most one page per translation key and language.
+
+    Like `operations.resolve_duplicate_translations`, which this migration
+    must not import: a live page is kept before a draft, then the page
+    with the highest primary key. The other pages get a new translation
+    key of their own.
+    """
+    TranslatablePage = apps.get_model(
+        'wagtail_page_translation', 'TranslatablePage')
+    duplicates = list(
+        TranslatablePage.objects
+        .order_by()
+        .values_list('translation_key', 'language_id')
+        .annotate(count=models.Count('pk'))
+        .filter(count__gt=1))
+
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        batch = set(
+            (key, language_id)
+            for key, language_id, count in duplicates[start:start + BATCH_SIZE])
+        rows = list(
+            TranslatablePage.objects
+            .filter(translation_key__in=set(key for key, _ in batch))
+            .order_by('pk')
+            .values_list('pk', 'translation_key', 'language_id', 'live'))
+
+        kept = {}
+        for pk, key, language_id, live in rows:
+            if (key, language_id) not in batch:
+                continue
+            if live or not kept.get((key, language_id), (None, False))[1]:
+                kept[(key, language_id)] = (pk, live)
+
+        for pk, key, language_id, live in rows:
+            if ((key, language_id) in batch and
+                    kept[(key, language_id)][0] != pk):
+                TranslatablePage.objects.filter(pk=pk).update(
+                    translation_key=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_page_translation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='translatablepage',
+            unique_together=set([('translation_key', 'language')]),
+        ),
+    ]
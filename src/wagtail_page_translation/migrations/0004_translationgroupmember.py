@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 08:44
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_members(apps, schema_editor):
+    TranslatablePage = apps.get_model(
+        'wagtail_page_translation', 'TranslatablePage')
+    TranslationGroupMember = apps.get_model(
+        'wagtail_page_translation', 'TranslationGroupMember')
+
+    rows = TranslatablePage.objects.order_by('pk').values_list(
+        'pk', 'translation_key', 'language_id', 'language__order',
+        'url_path', 'live', 'content_type_id')
+    members = []
+    for (pk, translation_key, language_id, language_order, url_path, live,
+         content_type_id) in rows.iterator():
+        members.append(TranslationGroupMember(
+            page_id=pk, translation_key=translation_key,
+            language_id=language_id, language_order=language_order,
+            url_path=url_path, live=live, content_type_id=content_type_id))
+        if len(members) >= 1000:
+            TranslationGroupMember.objects.bulk_create(members)
+            members = []
+    TranslationGroupMember.objects.bulk_create(members)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('wagtail_page_translation', '0003_translationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationGroupMember',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='translation_member', serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('translation_key', models.UUIDField()),
+                ('language_order', models.IntegerField(default=0)),
+                ('url_path', models.TextField()),
+                ('live', models.BooleanField(default=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtail_page_translation.Language')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='translationgroupmember',
+            index_together=set([('translation_key', 'language_order')]),
+        ),
+        migrations.RunPython(populate_members, migrations.RunPython.noop),
+    ]
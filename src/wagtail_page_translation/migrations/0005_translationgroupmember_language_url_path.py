@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+INDEX_NAME = 'wagtail_page_translation_member_lang_url'
+
+
+def get_url_path_column(vendor, quote_name):
+    """Return the indexed `url_path` column for a database vendor.
+
+    The filters of `TranslatablePageQuerySet.in_language` are `LIKE
+    'prefix%'` lookups. On PostgreSQL they only use a btree index with the
+    `text_pattern_ops` operator class, unless the database collation is
+    "C". MySQL can't index a TEXT column without a prefix length, the
+    index then narrows the lookups down to the first 255 characters.
+    """
+    column = quote_name('url_path')
+    if vendor == 'postgresql':
+        return '%s text_pattern_ops' % column
+    if vendor == 'mysql':
+        return '%s(255)' % column
+    return column
+
+
+def create_index(apps, schema_editor):
+    model = apps.get_model('wagtail_page_translation', 'TranslationGroupMember')
+    quote_name = schema_editor.quote_name
+    schema_editor.execute('CREATE INDEX %s ON %s (%s, %s)' % (
+        quote_name(INDEX_NAME),
+        quote_name(model._meta.db_table),
+        quote_name('language_id'),
+        get_url_path_column(schema_editor.connection.vendor, quote_name)))
+
+
+def drop_index(apps, schema_editor):
+    # SQLite recreates the index under another name whenever it rebuilds
+    # the table, look it up by its columns
+    model = apps.get_model('wagtail_page_translation', 'TranslationGroupMember')
+    table = model._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        constraints = schema_editor.connection.introspection.get_constraints(
+            cursor, table)
+    for name, constraint in constraints.items():
+        if (constraint['index'] and not constraint['unique'] and
+                constraint['columns'] == ['language_id', 'url_path']):
+            schema_editor.execute(schema_editor.sql_delete_index % {
+                'table': schema_editor.quote_name(table),
+                'name': schema_editor.quote_name(name),
+            })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_page_translation', '0004_translationgroupmember'),
+    ]
+
+    operations = [
+        # `index_together` can't express the operator class nor the prefix
+        # length, the index is created with SQL for each vendor
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_index, drop_index),
+            ],
+            state_operations=[
+                migrations.AlterIndexTogether(
+                    name='translationgroupmember',
+                    index_together=set([
+                        ('translation_key', 'language_order'),
+                        ('language', 'url_path'),
+                    ]),
+                ),
+            ],
+        ),
+    ]
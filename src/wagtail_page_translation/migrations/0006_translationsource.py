@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 08:52
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_page_translation', '0005_translationgroupmember_language_url_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationSource',
+            fields=[
+                ('translation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='translation_source', serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('synced_at', models.DateTimeField()),
+                ('changed_at', models.DateTimeField(db_index=True, null=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtail_page_translation.TranslatablePage')),
+            ],
+        ),
+    ]
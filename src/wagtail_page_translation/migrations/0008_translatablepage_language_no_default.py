@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 08:59
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_page_translation', '0007_translationgroupmember_modified_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='translatablepage',
+            name='language',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='wagtail_page_translation.Language'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:07
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0040_page_draft_title'),
+        ('wagtail_page_translation', '0008_translatablepage_language_no_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LanguageUnpublishedPage',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='language_unpublished', serialize=False, to='wagtail_page_translation.TranslatablePage')),
+                ('live_revision', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailcore.PageRevision')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_page_translation', '0009_languageunpublishedpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedTranslationGroup',
+            fields=[
+                ('translation_key', models.UUIDField(primary_key=True, serialize=False)),
+                ('deleted_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,16 +1,22 @@
 import uuid
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.http import Http404
 from django.shortcuts import redirect
+from django.utils import timezone
 from django.utils.encoding import force_text
-from django.utils.translation import activate, ugettext_lazy as _
+from django.utils.translation import (
+    LANGUAGE_SESSION_KEY, activate, ugettext_lazy as _)
 
 from wagtail.wagtailcore.models import Page
 from wagtail.wagtailadmin.edit_handlers import FieldPanel, MultiFieldPanel
 
-from .managers import LanguageManager
+from .cache import language_registry
+from .instrumentation import measure
+from .managers import LanguageManager, TranslatablePageManager
+from .memo import get_memo
 
 
 class Language(models.Model):
@@ -41,16 +47,25 @@ class Language(models.Model):
         return force_text(dict(settings.LANGUAGES).get(self.code))
 
     objects = LanguageManager()
-    # def has_pages_in_site(self, site):
-    #     return (
-    #         self.pages.filter(
-    #             path__startswith=site.root_page.path
-    #         ).exists())
+
+    def has_pages_in_site(self, site):
+        """Check if there are pages in this language in the given site.
+
+        :param site: Site instance
+        :return: Boolean
+
+        """
+        return (
+            TranslatablePage.objects.filter(
+                language=self,
+                path__startswith=site.root_page.path
+            ).exists())
 
 
 def _language_default():
     # Let the default return a PK, so migrations can also work with this value.
     # The FakeORM model in the migrations differ from this Django model.
+    # No longer the field default, but still referenced by the migrations.
     default_language = Language.objects.default()
     if default_language is None:
         return None
@@ -58,7 +73,22 @@ def _language_default():
         return default_language.pk
 
 
-class TranslatablePage(Page):
+class AbstractTranslatablePage(models.Model):
+    """Abstract superclass for `TranslatablePage`.
+
+    Managers set on concrete models are not inherited through multi-table
+    inheritance, so like Wagtail's `AbstractPage` the manager is attached
+    to an abstract superclass to retain it on subclasses of
+    `TranslatablePage`.
+    """
+
+    objects = TranslatablePageManager()
+
+    class Meta:
+        abstract = True
+
+
+class TranslatablePage(AbstractTranslatablePage, Page):
     # Explicitly defined with a unique name so that clashes are unlikely
     translatable_page_ptr = models.OneToOneField(
         Page, parent_link=True, related_name='+', on_delete=models.CASCADE)
@@ -70,25 +100,82 @@ class TranslatablePage(Page):
 
     # Deleting a language that still has pages is not allowed, as it would
     # either lead to tree corruption, or to pages with a null language.
-    language = models.ForeignKey(Language, on_delete=models.PROTECT,
-                                 default=_language_default)
+    # Pages saved without a language get the default language, see `save`.
+    language = models.ForeignKey(Language, on_delete=models.PROTECT)
     # Language, related_name='pages', on_delete=models.PROTECT,
 
+    def save(self, *args, **kwargs):
+        # The default language is only resolved here rather than as field
+        # default, so instantiating pages costs no lookup at all.
+        if self.language_id is None:
+            self.language_id = _language_default()
+        return super(TranslatablePage, self).save(*args, **kwargs)
+
+    def validate_unique(self, exclude=None):
+        # Pages restored from a revision only have the primary key of `Page`
+        # set, without the parent link the unique check would match the
+        # page itself.
+        if self.translatable_page_ptr_id is None:
+            self.translatable_page_ptr_id = self.id
+        super(TranslatablePage, self).validate_unique(exclude=exclude)
+
+    def copy(self, recursive=False, to=None, update_attrs=None, **kwargs):
+        # A copy in the same language is a new page rather than a
+        # translation, it starts a translation group of its own.
+        update_attrs = dict(update_attrs or {})
+        language = update_attrs.get('language')
+        language_id = language.pk if language else self.language_id
+        if ('translation_key' not in update_attrs and
+                language_id == self.language_id):
+            update_attrs['translation_key'] = uuid.uuid4()
+        page_copy = super(TranslatablePage, self).copy(
+            recursive=recursive, to=to, update_attrs=update_attrs, **kwargs)
+        if language_id != self.language_id:
+            from .staleness import mark_synced
+            mark_synced(page_copy, self)
+        return page_copy
+
+    def _cache_language(self):
+        """Attach the page language from the language registry.
+
+        Accessing `self.language` afterwards does not hit the database.
+        Nothing is attached when the language is not in the registry yet,
+        `self.language` then falls back to a regular query.
+        """
+        cache_name = self._meta.get_field('language').get_cache_name()
+        if hasattr(self, cache_name):
+            return
+        try:
+            language = Language.objects.get_by_id(self.language_id)
+        except Language.DoesNotExist:
+            return
+        setattr(self, cache_name, language)
+
+    @property
+    def language_code(self):
+        """Code of the page language, usually without any query."""
+        self._cache_language()
+        return self.language.code
+
+    def route(self, request, path_components):
+        self._cache_language()
+        return super(TranslatablePage, self).route(request, path_components)
+
+    @measure('translatable_page.serve')
     def serve(self, request, *args, **kwargs):
-        activate(self.language.code)
-        request.LANGUAGE_CODE = self.language.code
+        language_code = self.language_code
+        activate(language_code)
+        request.LANGUAGE_CODE = language_code
         return super(TranslatablePage, self).serve(request, *args, **kwargs)
 
     class Meta:
-        pass
-        # # This class is *not* abstract, so that the unique_together
-        # # constraint holds across all page classes. Translations of a page
-        # # do not have to be of the same page type.
-        #
-        # unique_together = [
-        #     # Only one language allowed per translation group
-        #     ('translation_key', 'language'),
-        # ]
+        # This class is *not* abstract, so that the unique_together
+        # constraint holds across all page classes. Translations of a page
+        # do not have to be of the same page type.
+        unique_together = [
+            # Only one language allowed per translation group
+            ('translation_key', 'language'),
+        ]
 
     is_creatable = False
 
@@ -106,6 +193,36 @@ class TranslatablePage(Page):
     def get_admin_display_title(self):
         return "{} ({})".format(self.title, self.language)
 
+    def _get_prefetched_translations(self, language_ids=None):
+        """Return translations prefetched by `with_translations`.
+
+        :param language_ids: ids of the languages which must have been
+            prefetched, None for all languages
+        :return: dict of language id to page, or None if the translations
+            were not prefetched for all requested languages
+
+        """
+        translations = getattr(self, '_prefetched_translations', None)
+        if translations is None:
+            return None
+        prefetched_ids = self._prefetched_translation_languages
+        if prefetched_ids is not None and (
+                language_ids is None or
+                not prefetched_ids.issuperset(language_ids)):
+            return None
+        return translations
+
+    def _get_memoized_translations(self):
+        """Return the translation group from the request memo.
+
+        :return: dict of language id to page, or None if no memo is active
+
+        """
+        memo = get_memo()
+        if memo is None:
+            return None
+        return memo.get_group(self.translation_key)
+
     def get_translations(self, only_live=True):
         """Get all translations of this page.
 
@@ -113,17 +230,38 @@ class TranslatablePage(Page):
         are sorted by the language position.
 
         :param only_live: Boolean to filter on live pages & languages.
-        :return: TranslatablePage instance
+        :return: TranslatablePage queryset, or a list when the translations
+            were prefetched with `with_translations` or are memoized for
+            the current request
 
         """
+        prefetched = self._get_prefetched_translations()
+        if prefetched is None:
+            prefetched = self._get_memoized_translations()
+        if prefetched is not None:
+            translations = []
+            for language in Language.objects.all_languages():
+                page = prefetched.get(language.pk)
+                if page is None or page.pk == self.pk:
+                    continue
+                if only_live and not (page.live and language.live):
+                    continue
+                translations.append(page)
+            return translations
+
         # canonical_page_id = self.canonical_page_id or self.pk
         translations = TranslatablePage.objects.filter(
-            translation_key=self.translation_key).exclude(pk=self.pk)
+            translation_member__translation_key=self.translation_key).\
+            exclude(pk=self.pk)
 
         if only_live:
-            translations = translations.live().filter(language__live=True)
+            translations = translations.filter(
+                translation_member__live=True,
+                translation_member__language_id__in=[
+                    language.pk
+                    for language in Language.objects.live_languages()])
 
-        return translations.order_by('language__order')
+        return translations.order_by('translation_member__language_order')
 
     def has_translation(self, language):
         """Check if page isn't already translated in given language.
@@ -132,37 +270,63 @@ class TranslatablePage(Page):
         :return: Boolean
 
         """
-        return TranslatablePage.objects.filter(
+        prefetched = self._get_prefetched_translations([language.pk])
+        if prefetched is None:
+            prefetched = self._get_memoized_translations()
+        if prefetched is not None:
+            return language.pk in prefetched
+
+        return TranslationGroupMember.objects.filter(
             translation_key=self.translation_key, language=language).exists()
 
     def get_translation(self, language):
         """Get translated page for given language.
 
         :param language: Language instance
-        :return: Boolean
+        :return: specific TranslatablePage instance or None
 
         """
-        return TranslatablePage.objects.filter(
-            translation_key=self.translation_key, language=language).\
-            specific().last()
+        translations = self._get_prefetched_translations([language.pk])
+        if translations is None:
+            translations = self._get_memoized_translations()
+        if translations is not None:
+            translation = translations.get(language.pk)
+            # Specific pages are returned as is, `specific` of generic
+            # pages is cached on the page
+            return translation.specific if translation is not None else None
+
+        member = (
+            TranslationGroupMember.objects
+            .filter(translation_key=self.translation_key, language=language)
+            .values_list('page_id', 'content_type_id')
+            .first())
+        if member is None:
+            return None
+        # Fetch the specific page directly, without the generic page
+        page_id, content_type_id = member
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        try:
+            return model._default_manager.get(pk=page_id)
+        except model.DoesNotExist:
+            return None
 
     def get_translation_from_code(self, language_code):
-        language = Language.objects.get(code=language_code)
+        language = Language.objects.get_by_code(language_code)
         return self.get_translation(language)
 
     def get_translation_parent(self, language):
-        site = self.get_site()
-        if not language.has_pages_in_site(site):
-            return site.root_page
-
-        translation_parent = (
-            TranslatablePage.objects
-            .filter(
-                translation_key=self.get_parent().translation_key,
-                language=language,
-                path__startswith=site.root_page.path
-            ).first())
-        return translation_parent
+        """Get the parent page for a translation of this page.
+
+        See `resolvers.get_translation_parents` for how the parent is
+        resolved.
+
+        :param language: Language instance
+        :return: Page instance, or None if the parent page has no
+            translation in the given language
+
+        """
+        from .resolvers import get_translation_parents
+        return get_translation_parents([self], language)[self.pk]
 
     # @cached_property
     # def has_translations(self):
@@ -177,8 +341,31 @@ def get_user_languages(request):
     """
     Get the best matching Languages for a request, in order from best to worst.
     The default language (if there is one) will always appear in this list.
+
+    The language stored in the session or in the language cookie comes
+    first, followed by the languages accepted by the `Accept-Language`
+    header.
     """
-    return [Language.objects.default()]
+    state = language_registry.get_state()
+    languages = []
+
+    preferred_codes = []
+    if hasattr(request, 'session'):
+        preferred_codes.append(request.session.get(LANGUAGE_SESSION_KEY))
+    preferred_codes.append(request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME))
+    for code in preferred_codes:
+        language = state.match(code)
+        if language is not None and language not in languages:
+            languages.append(language)
+
+    header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+    for language in state.match_accept_language(header):
+        if language not in languages:
+            languages.append(language)
+
+    if state.default is not None and state.default not in languages:
+        languages.append(state.default)
+    return languages
 
 
 class AbstractTranslationIndexPage(Page):
@@ -188,6 +375,7 @@ class AbstractTranslationIndexPage(Page):
     route the requests to the right language.
     """
 
+    @measure('translation_index_page.serve')
     def serve(self, request, *args, **kwargs):
         """Serve TranslatablePage in the correct language
 
@@ -195,17 +383,178 @@ class AbstractTranslationIndexPage(Page):
         :return: Http403 or Http404
 
         """
-        languages = get_user_languages(request)
-        candidates = TranslatablePage.objects.live().specific().child_of(self)
-        for language in languages:
-            try:
-                translation = candidates.filter(language=language).get()
-                return redirect(translation.url)
-            except TranslatablePage.DoesNotExist:
-                continue
+        from .resolvers import get_child_urls
+
+        urls = get_child_urls(self)
+        for language in get_user_languages(request):
+            if language.pk in urls:
+                return redirect(urls[language.pk])
 
         # No translation was found, not even in the default language.
         raise Http404
 
     class Meta:
         abstract = True
+
+
+class TranslationGroupMember(models.Model):
+    """Denormalized translation group membership of a page.
+
+    One narrow row per translatable page, holding what is needed to
+    resolve the translations of a page and their URLs without joining the
+    page tables. Rows are kept up to date by signal handlers and bulk
+    operations, see `members.py`, and can be rebuilt with the
+    `rebuild_translation_members` management command.
+    """
+
+    page = models.OneToOneField(
+        TranslatablePage, primary_key=True, related_name='translation_member',
+        on_delete=models.CASCADE)
+    translation_key = models.UUIDField()
+    language = models.ForeignKey(
+        Language, related_name='+', on_delete=models.CASCADE)
+    # Copy of `Language.order`, translations are listed in this order
+    language_order = models.IntegerField(default=0)
+    url_path = models.TextField()
+    live = models.BooleanField(default=True)
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType', related_name='+',
+        on_delete=models.CASCADE)
+    # Last change of the row, or of its translation group when another
+    # page of the group was deleted
+    modified_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        index_together = [
+            ('translation_key', 'language_order'),
+            # Pages of a language within a subtree, see
+            # `TranslatablePageQuerySet.in_language`. The index is created
+            # for each database vendor by migration 0005.
+            ('language', 'url_path'),
+        ]
+
+    def __str__(self):
+        return "{} ({})".format(self.url_path, self.language_id)
+
+
+class DeletedTranslationGroup(models.Model):
+    """Translation group whose last page was deleted.
+
+    Groups without pages have no members left, the markers let the API
+    list them as changed, see `views.api.changed_groups`.
+    """
+
+    translation_key = models.UUIDField(primary_key=True)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return "{} ({})".format(self.translation_key, self.deleted_at)
+
+
+class TranslationSource(models.Model):
+    """Page a translation was made from, and whether it is still in sync.
+
+    A marker is created when a page is copied into another language.
+    Publishing the source sets `changed_at`, which makes the translation
+    stale; publishing the translation marks it as synced again. Stale
+    translations are found with `TranslatablePageQuerySet.stale`.
+    """
+
+    translation = models.OneToOneField(
+        TranslatablePage, primary_key=True,
+        related_name='translation_source', on_delete=models.CASCADE)
+    source = models.ForeignKey(
+        TranslatablePage, related_name='+', on_delete=models.CASCADE)
+    # When the translation was last made or published
+    synced_at = models.DateTimeField()
+    # When the source was first published after `synced_at`, None while the
+    # translation is up to date
+    changed_at = models.DateTimeField(null=True, db_index=True)
+
+    def __str__(self):
+        return "{} ({})".format(self.translation_id, self.source_id)
+
+
+class LanguageUnpublishedPage(models.Model):
+    """Page taken offline together with its language.
+
+    Markers are created by `operations.unpublish_language`, and only the
+    marked pages are published again by `operations.publish_language`, as
+    they were when they were unpublished. Pages an editor unpublished on
+    their own stay unpublished.
+    """
+
+    page = models.OneToOneField(
+        TranslatablePage, primary_key=True,
+        related_name='language_unpublished', on_delete=models.CASCADE)
+    # Revision the page was live with, restored when it is published again
+    live_revision = models.ForeignKey(
+        'wagtailcore.PageRevision', null=True, related_name='+',
+        on_delete=models.SET_NULL)
+
+    def __str__(self):
+        return "{} ({})".format(self.page_id, self.live_revision_id)
+
+
+class TranslationJob(models.Model):
+    """Translation of a page waiting to be done by a worker.
+
+    Jobs are created by the "Add translation" view when
+    `WAGTAIL_PAGE_TRANSLATION_TRANSLATION_JOBS` is enabled, and processed
+    by the `process_translation_jobs` management command.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_RUNNING, _("Running")),
+        (STATUS_DONE, _("Done")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+
+    page = models.ForeignKey(
+        TranslatablePage, related_name='translation_jobs',
+        on_delete=models.CASCADE)
+    language = models.ForeignKey(
+        Language, related_name='+', on_delete=models.CASCADE)
+    parent = models.ForeignKey(
+        Page, related_name='+', on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, related_name='+',
+        on_delete=models.SET_NULL)
+
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(allow_unicode=True, max_length=255)
+    copy_subpages = models.BooleanField(default=False)
+    keep_live = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    pages_done = models.PositiveIntegerField(default=0)
+    pages_total = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        index_together = [
+            # Workers pick the oldest pending job
+            ('status', 'created_at'),
+        ]
+
+    def __str__(self):
+        return "{} ({}): {}".format(
+            self.title, self.language, self.get_status_display())
+
+    @property
+    def progress(self):
+        """Percentage of the pages translated so far."""
+        if not self.pages_total:
+            return 100 if self.status == self.STATUS_DONE else 0
+        return int(100 * self.pages_done / self.pages_total)
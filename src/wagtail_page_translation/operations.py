@@ -0,0 +1,781 @@
+"""Bulk operations on translatable pages."""
+import uuid
+from collections import defaultdict
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from modelcluster.models import get_all_child_relations
+from treebeard.exceptions import PathOverflow
+from wagtail.wagtailcore.models import Page, PageRevision
+
+from .cache import (
+    bulk_invalidation, invalidate_children, invalidate_translation_groups)
+from .members import insert_members, rebuild_members, touch_groups
+from .models import (
+    LanguageUnpublishedPage, TranslatablePage, TranslationGroupMember)
+from .staleness import insert_sources
+from .utils import iterate_in_chunks
+
+
+# Fields which are never copied from the source page, like `Page.copy`
+COPY_EXCLUDE_FIELDS = ['id', 'path', 'depth', 'numchild', 'url_path']
+
+
+class TargetPage(object):
+    """Position of an existing page in the tree."""
+
+    __slots__ = ('pk', 'path', 'depth', 'url_path')
+
+    def __init__(self, pk, path, depth, url_path):
+        self.pk = pk
+        self.path = path
+        self.depth = depth
+        self.url_path = url_path
+
+
+class ChildrenState(object):
+    """Last used path step and slugs in use below a target parent."""
+
+    def __init__(self, last_step=0, slugs=None):
+        self.last_step = last_step
+        self.slugs = set(slugs or [])
+
+
+def get_parent_path(path):
+    return path[:-Page.steplen]
+
+
+def get_page_models(model):
+    """Return `Page` and its concrete subclasses up to `model`, top first."""
+    parents = [
+        parent for parent in model._meta.get_parent_list()
+        if issubclass(parent, Page)]
+    parents.sort(key=lambda parent: len(parent._meta.get_parent_list()))
+    return parents + [model]
+
+
+def insert_rows(model, objs, using):
+    """Insert the local table rows of `model` for `objs` in batches.
+
+    Multi-table inherited models can't use `bulk_create`, so this inserts
+    the rows of a single table of the inheritance chain.
+    """
+    fields = [
+        field for field in model._meta.local_concrete_fields
+        if not isinstance(field, models.AutoField)]
+    connection = connections[using]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    manager = model._base_manager.using(using)
+    for start in range(0, len(objs), batch_size):
+        manager._insert(objs[start:start + batch_size], fields=fields)
+
+
+def is_within_subtree_translation(source, language, parent):
+    """Return whether a page is within a translation of a subtree.
+
+    Existing translations of a subtree are moved below the parent of its
+    translation, which fails when the parent is one of them or one of
+    their descendants. Costs two queries, whatever the size of the
+    subtree.
+
+    :param source: root page of the subtree to translate
+    :param language: Language instance to translate into
+    :param parent: page which receives the translation of `source`
+    :return: Boolean
+
+    """
+    ancestor_paths = [
+        parent.path[:end]
+        for end in range(Page.steplen, len(parent.path) + 1, Page.steplen)]
+    translation_keys = list(
+        TranslatablePage.objects
+        .filter(path__in=ancestor_paths, language=language)
+        .values_list('translation_key', flat=True))
+    return bool(translation_keys) and (
+        TranslatablePage.objects
+        .filter(path__startswith=source.path,
+                translation_key__in=translation_keys)
+        .exists())
+
+
+class SubtreeTranslator(object):
+    """Create or update the translation of a page and all its descendants.
+
+    The subtree is walked in path order, in chunks of `chunk_size` pages.
+    Every chunk runs in its own transaction and costs a fixed number of
+    queries: tree paths are allocated in memory and new pages, their child
+    objects and their initial revisions are inserted in bulk.
+
+    Existing translations keep their content, they are moved below the
+    translation of their source's parent when needed, with a new slug if
+    theirs is taken there. Source pages which are not translatable, or
+    already in the target language, are skipped together with their
+    descendants, like sources whose translation is within the subtree.
+    Source pages of a translation group translated earlier in the run are
+    not translated again, their descendants are translated below the
+    translation of the group.
+
+    As with other bulk inserts, the search index is not updated, run the
+    `update_index` management command afterwards.
+    """
+
+    def __init__(self, source, language, parent, user=None, keep_live=True,
+                 root_attrs=None, chunk_size=100, progress=None):
+        """
+        :param source: root page of the subtree to translate
+        :param language: Language instance to translate into
+        :param parent: page which receives the translation of `source`
+        :param user: owner of the new pages and their revisions
+        :param keep_live: Boolean to publish copies of live pages
+        :param root_attrs: dict of field values for the translation of
+            `source`, like `title` and `slug`
+        :param chunk_size: number of source pages handled per transaction
+        :param progress: callable receiving the number of handled and the
+            total number of source pages after every chunk
+
+        """
+        if parent.path.startswith(source.path):
+            raise ValueError(
+                "You cannot translate a tree branch into itself")
+
+        self.source = source
+        self.language = language
+        self.user = user
+        self.keep_live = keep_live
+        self.root_attrs = root_attrs or {}
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.using = router.db_for_write(Page)
+        self.now = timezone.now()
+
+        self.stats = {'created': 0, 'moved': 0, 'unchanged': 0, 'skipped': 0}
+
+        # Translated pages by translation key of their source page
+        self.translated = {}
+        # Translated pages by path of their source page
+        self.targets = {
+            get_parent_path(source.path): TargetPage(
+                parent.pk, parent.path, parent.depth, parent.url_path),
+        }
+        # ChildrenState by path of target parents
+        self.children = {}
+        # Paths of the target pages created by this run
+        self.created_paths = set()
+        # New pages waiting to be inserted, in path order
+        self.pending = []
+        # Pending increments of `numchild` by path of existing parents
+        self.numchild = defaultdict(int)
+        # Child objects of the pages to copy, by source page id
+        self.child_objects = {}
+
+    def get_source_rows(self):
+        return (
+            TranslatablePage.objects
+            .filter(path__startswith=self.source.path)
+            .order_by('path')
+            .values_list('pk', 'path', 'translation_key', 'language_id'))
+
+    def run(self):
+        """Translate the subtree and return counts of the handled pages."""
+        parent = self.targets[get_parent_path(self.source.path)]
+        if is_within_subtree_translation(self.source, self.language, parent):
+            raise ValueError(
+                "The parent page is within an existing translation of the "
+                "branch, which can't be moved into itself")
+
+        rows = self.get_source_rows()
+        total = rows.count()
+        done = 0
+        last_path = ''
+        while True:
+            chunk = list(rows.filter(path__gt=last_path)[:self.chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic(using=self.using):
+                self.process_chunk(chunk)
+                self.flush()
+            last_path = chunk[-1][1]
+            done += len(chunk)
+            if self.progress is not None:
+                self.progress(done, total)
+        return self.stats
+
+    def get_existing(self, translation_keys):
+        """Return existing translations, including those within the source
+        subtree."""
+        existing = {}
+        rows = (
+            TranslatablePage.objects
+            .filter(translation_key__in=translation_keys,
+                    language=self.language)
+            .order_by('path')
+            .values_list('translation_key', 'pk', 'path', 'depth',
+                         'url_path'))
+        for key, pk, path, depth, url_path in rows:
+            existing.setdefault(key, TargetPage(pk, path, depth, url_path))
+        return existing
+
+    def get_sources(self, page_ids):
+        """Return specific source pages and load their child objects."""
+        sources = dict(
+            (page.pk, page)
+            for page in Page.objects.filter(pk__in=page_ids).specific())
+
+        by_model = defaultdict(list)
+        for page in sources.values():
+            by_model[type(page)].append(page.pk)
+            self.child_objects[page.pk] = defaultdict(list)
+
+        for model, pks in by_model.items():
+            for relation in get_all_child_relations(model):
+                accessor_name = relation.get_accessor_name()
+                parental_key_name = relation.field.attname
+                child_objects = (
+                    relation.related_model._default_manager
+                    .filter(**{'%s__in' % parental_key_name: pks}))
+                for child_object in child_objects:
+                    page_id = getattr(child_object, parental_key_name)
+                    self.child_objects[page_id][accessor_name].append(
+                        child_object)
+        return sources
+
+    def process_chunk(self, chunk):
+        keys = [row[2] for row in chunk]
+        existing = self.get_existing(keys)
+        sources = self.get_sources([
+            row[0] for row in chunk
+            if row[2] not in existing and row[2] not in self.translated and
+            row[3] != self.language.pk])
+
+        for pk, path, key, language_id in chunk:
+            parent = self.targets.get(get_parent_path(path))
+            if parent is None or language_id == self.language.pk:
+                self.stats['skipped'] += 1
+                continue
+
+            # Another source of the same group, like a translation within
+            # the subtree, would make a second translation in the language
+            target = self.translated.get(key)
+            if target is not None:
+                self.stats['unchanged'] += 1
+                self.targets[path] = target
+                continue
+
+            target = existing.get(key)
+            if target is not None and target.path.startswith(self.source.path):
+                # Translations within the subtree stay where they are,
+                # the walk would reach the pages translated below them
+                self.stats['skipped'] += 1
+                continue
+            if target is None:
+                attrs = self.root_attrs if path == self.source.path else {}
+                target = self.add_copy(sources[pk], parent, attrs)
+                self.stats['created'] += 1
+            elif get_parent_path(target.path) != parent.path:
+                self.move(target, parent)
+                existing.update(self.get_existing(keys))
+                self.stats['moved'] += 1
+            else:
+                self.stats['unchanged'] += 1
+            self.translated[key] = target
+            self.targets[path] = target
+
+    def get_children_state(self, parent):
+        state = self.children.get(parent.path)
+        if state is None:
+            if parent.path in self.created_paths:
+                state = ChildrenState()
+            else:
+                rows = (
+                    Page.objects
+                    .filter(path__startswith=parent.path,
+                            depth=parent.depth + 1)
+                    .values_list('path', 'slug'))
+                state = ChildrenState()
+                for path, slug in rows:
+                    state.last_step = max(
+                        state.last_step,
+                        Page._str2int(path[-Page.steplen:]))
+                    state.slugs.add(slug)
+            self.children[parent.path] = state
+        return state
+
+    def allocate_path(self, parent):
+        state = self.get_children_state(parent)
+        state.last_step += 1
+        path = Page._get_path(parent.path, parent.depth + 1, state.last_step)
+        if len(path) > len(parent.path) + Page.steplen:
+            raise PathOverflow("Path Overflow from: '%s'" % parent.path)
+        return path
+
+    def allocate_slug(self, parent, slug):
+        taken = self.get_children_state(parent).slugs
+        candidate = slug
+        number = 1
+        while candidate in taken:
+            number += 1
+            candidate = '%s-%d' % (slug, number)
+        taken.add(candidate)
+        return candidate
+
+    def add_copy(self, source, parent, attrs):
+        """Build the translation of `source` below `parent`.
+
+        The copy is inserted by the next `flush`.
+        """
+        values = {}
+        for field in source._meta.concrete_fields:
+            if field.primary_key or field.name in COPY_EXCLUDE_FIELDS:
+                continue
+            remote_field = getattr(field, 'remote_field', None)
+            if (isinstance(field, models.OneToOneField) and
+                    remote_field.parent_link):
+                continue
+            values[field.attname] = getattr(source, field.attname)
+
+        page = type(source)(**values)
+        page.language_id = self.language.pk
+        page.latest_revision_created_at = self.now
+        if self.user is not None:
+            page.owner_id = self.user.pk
+        for name, value in attrs.items():
+            setattr(page, name, value)
+        if hasattr(page, 'draft_title'):
+            page.draft_title = page.title
+
+        if not self.keep_live or not page.live:
+            page.live = False
+            page.has_unpublished_changes = True
+            page.first_published_at = None
+            if hasattr(page, 'last_published_at'):
+                page.last_published_at = None
+        else:
+            page.has_unpublished_changes = False
+            page.first_published_at = self.now
+            if hasattr(page, 'last_published_at'):
+                page.last_published_at = self.now
+        page.live_revision_id = None
+
+        page.path = self.allocate_path(parent)
+        page.depth = parent.depth + 1
+        page.numchild = 0
+        page.slug = self.allocate_slug(parent, page.slug)
+        page.url_path = parent.url_path + page.slug + '/'
+        page._source_id = source.pk
+
+        if parent.path in self.created_paths and parent.pk is None:
+            parent.numchild += 1
+        else:
+            self.numchild[parent.path] += 1
+        self.created_paths.add(page.path)
+        self.pending.append(page)
+        return page
+
+    def move(self, target, parent):
+        """Move an existing translation below `parent`.
+
+        Like the copies, the page gets a new slug if its slug is taken by
+        a child of `parent`.
+        """
+        # The parent may still be pending
+        self.flush()
+        old_path = target.path
+        old_url_path = target.url_path
+
+        page = Page.objects.get(pk=target.pk)
+        slug = self.allocate_slug(parent, page.slug)
+        if slug != page.slug:
+            # `Page.move` validates the slug of the moved page
+            Page.objects.filter(pk=page.pk).update(slug=slug)
+        page.move(Page.objects.get(pk=parent.pk), pos='last-child')
+        target.path, target.depth, target.url_path = (
+            Page.objects.filter(pk=target.pk)
+            .values_list('path', 'depth', 'url_path').get())
+
+        # Keep the known positions below the moved page up to date
+        for page in self.targets.values():
+            if page is not target and page.path.startswith(old_path):
+                page.path = target.path + page.path[len(old_path):]
+                page.depth = len(page.path) // Page.steplen
+                page.url_path = (
+                    target.url_path + page.url_path[len(old_url_path):])
+        self.children = dict(
+            (path, state) for path, state in self.children.items()
+            if not path.startswith(old_path) and path != parent.path)
+
+    def flush(self):
+        """Insert the pending pages, their child objects and revisions."""
+        pages, self.pending = self.pending, []
+        if pages:
+            self.insert_pages(pages)
+            insert_members(pages)
+            insert_sources(pages, self.now)
+            self.insert_child_objects(pages)
+            self.insert_revisions(pages)
+            invalidate_translation_groups(
+                page.translation_key for page in pages)
+            invalidate_children(get_parent_path(page.path) for page in pages)
+
+        # Increment `numchild` of existing parents, one update per delta
+        parents_by_delta = defaultdict(list)
+        for path, delta in self.numchild.items():
+            parents_by_delta[delta].append(path)
+        for delta, paths in parents_by_delta.items():
+            Page.objects.filter(path__in=paths).update(
+                numchild=models.F('numchild') + delta)
+        self.numchild.clear()
+
+    def insert_pages(self, pages):
+        insert_rows(Page, pages, self.using)
+
+        ids = dict(
+            Page.objects
+            .filter(path__in=[page.path for page in pages])
+            .values_list('path', 'pk'))
+
+        by_model = defaultdict(list)
+        for page in pages:
+            for model in get_page_models(type(page)):
+                setattr(page, model._meta.pk.attname, ids[page.path])
+                if model is not Page:
+                    by_model[model].append(page)
+            page._state.adding = False
+            page._state.db = self.using
+
+        # Parent tables first, `get_page_models` orders them by depth
+        models_in_order = sorted(
+            by_model, key=lambda model: len(model._meta.get_parent_list()))
+        for model in models_in_order:
+            insert_rows(model, by_model[model], self.using)
+
+    def insert_child_objects(self, pages):
+        connection = connections[self.using]
+        can_return_ids = (
+            getattr(connection.features, 'can_return_ids_from_bulk_insert',
+                    False) or
+            getattr(connection.features, 'can_return_rows_from_bulk_insert',
+                    False))
+
+        by_model = defaultdict(list)
+        for page in pages:
+            relations = self.child_objects.pop(page._source_id, {})
+            for relation in get_all_child_relations(type(page)):
+                accessor_name = relation.get_accessor_name()
+                copies = []
+                for child_object in relations.get(accessor_name, []):
+                    child_object.pk = None
+                    setattr(child_object, relation.field.attname, page.pk)
+                    copies.append(child_object)
+                    by_model[relation.related_model].append(child_object)
+                # Keep the copies in memory for the revision content
+                setattr(page, accessor_name, copies)
+
+        for model, objs in by_model.items():
+            if can_return_ids and not model._meta.parents:
+                model._default_manager.using(self.using).bulk_create(objs)
+            else:
+                # The ids are needed in the revision content
+                for obj in objs:
+                    obj.save(using=self.using)
+
+    def insert_revisions(self, pages):
+        PageRevision.objects.using(self.using).bulk_create([
+            PageRevision(
+                page_id=page.pk,
+                content_json=page.to_json(),
+                user=self.user,
+                created_at=self.now,
+                submitted_for_moderation=False)
+            for page in pages])
+
+        live_ids = [page.pk for page in pages if page.live]
+        if not live_ids:
+            return
+        revision_ids = (
+            PageRevision.objects
+            .filter(page_id__in=live_ids)
+            .values_list('page_id', 'pk'))
+        Page.objects.filter(pk__in=live_ids).update(
+            live_revision_id=models.Case(
+                *[models.When(pk=page_id, then=models.Value(revision_id))
+                  for page_id, revision_id in revision_ids],
+                output_field=models.IntegerField()))
+
+
+def translate_subtree(source, language, parent, **kwargs):
+    """Create or update the translation of `source` and its descendants.
+
+    See `SubtreeTranslator` for the keyword arguments.
+
+    :return: dict with the number of `created`, `moved`, `unchanged` and
+        `skipped` pages
+
+    """
+    return SubtreeTranslator(source, language, parent, **kwargs).run()
+
+
+def resolve_duplicate_translations(batch_size=500, dry_run=False):
+    """Leave at most one page per translation key and language.
+
+    Within every duplicate group a live page is kept before a draft, then
+    the page with the highest primary key, which `get_translation` used
+    to return whatever its state. The other pages get a new translation
+    key of their own, so no content is lost. Migration 0002 applies the
+    same rule.
+
+    :param batch_size: number of duplicate groups resolved per query
+    :param dry_run: Boolean to only count the duplicates
+    :return: dict with the number of duplicate `groups` and of `pages`
+        which got a new translation key
+
+    """
+    model = TranslatablePage
+    duplicates = list(
+        model.objects
+        .order_by()
+        .values_list('translation_key', 'language_id')
+        .annotate(count=models.Count('pk'))
+        .filter(count__gt=1))
+    stats = {'groups': len(duplicates), 'pages': 0}
+
+    for start in range(0, len(duplicates), batch_size):
+        batch = set(
+            (key, language_id)
+            for key, language_id, count in duplicates[start:start + batch_size])
+        rows = list(
+            model.objects
+            .filter(translation_key__in=set(key for key, _ in batch))
+            .order_by('pk')
+            .values_list('pk', 'translation_key', 'language_id', 'live'))
+
+        kept = {}
+        for pk, key, language_id, live in rows:
+            if (key, language_id) not in batch:
+                continue
+            # Later pages win among pages with equal state
+            if live or not kept.get((key, language_id), (None, False))[1]:
+                kept[(key, language_id)] = (pk, live)
+
+        new_keys = {}
+        for pk, key, language_id, live in rows:
+            if ((key, language_id) in batch and
+                    kept[(key, language_id)][0] != pk):
+                new_keys[pk] = uuid.uuid4()
+        stats['pages'] += len(new_keys)
+        if dry_run or not new_keys:
+            continue
+
+        with transaction.atomic():
+            model.objects.filter(pk__in=list(new_keys)).update(
+                translation_key=models.Case(
+                    *[models.When(pk=pk, then=models.Value(
+                        key, output_field=models.UUIDField()))
+                      for pk, key in new_keys.items()],
+                    output_field=models.UUIDField()))
+            rebuild_members(model.objects.filter(pk__in=list(new_keys)))
+            invalidate_translation_groups(key for key, _ in batch)
+    return stats
+
+
+def process_in_chunks(queryset, func, chunk_size=500, progress=None):
+    """Call `func` with the primary keys of `queryset` in chunks.
+
+    Every chunk is handled in a transaction of its own, and the caches are
+    invalidated once at the end instead of per page.
+
+    :param queryset: queryset of the pages to handle
+    :param func: callable receiving a list of primary keys
+    :param chunk_size: number of pages handled per transaction
+    :param progress: callable receiving the number of handled pages and
+        the total
+    :return: number of handled pages
+
+    """
+    total = queryset.count()
+    done = 0
+    with bulk_invalidation():
+        for chunk in iterate_in_chunks(queryset.values_list('pk'), chunk_size):
+            pks = [row[0] for row in chunk]
+            with transaction.atomic():
+                func(pks)
+            done += len(pks)
+            if progress:
+                progress(done, total)
+    return done
+
+
+def publish_language(language, chunk_size=500, progress=None):
+    """Publish the pages of a language again and make the language live.
+
+    Only the pages taken offline by `unpublish_language` are published,
+    with the revision they were live with. Pages which were unpublished
+    otherwise, or which expired, stay unpublished. No page signals are
+    sent.
+
+    :param language: Language instance
+    :return: number of published pages
+
+    """
+    def publish(pks):
+        live_revisions = dict(
+            LanguageUnpublishedPage.objects
+            .filter(page_id__in=pks)
+            .values_list('page_id', 'live_revision_id'))
+        # Drafts saved since the live revision stay unpublished. Older
+        # Wagtail versions don't record the last publication, compare with
+        # the time of the live revision instead.
+        published_at = dict(
+            PageRevision.objects
+            .filter(pk__in=[
+                revision_id for revision_id in live_revisions.values()
+                if revision_id is not None])
+            .values_list('pk', 'created_at'))
+        changed = [
+            pk for pk, latest_revision_created_at in (
+                Page.objects.filter(pk__in=pks)
+                .values_list('pk', 'latest_revision_created_at'))
+            if latest_revision_created_at is not None and
+            live_revisions.get(pk) in published_at and
+            latest_revision_created_at > published_at[live_revisions[pk]]]
+        Page.objects.filter(pk__in=pks).update(
+            live=True,
+            live_revision_id=models.Case(
+                *[models.When(pk=pk, then=models.Value(revision_id))
+                  for pk, revision_id in live_revisions.items()
+                  if revision_id is not None],
+                default=models.Value(None),
+                output_field=models.IntegerField()),
+            has_unpublished_changes=models.Case(
+                models.When(pk__in=changed, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField()))
+        TranslationGroupMember.objects.filter(page_id__in=pks).update(
+            live=True, modified_at=timezone.now())
+        LanguageUnpublishedPage.objects.filter(page_id__in=pks).delete()
+
+    count = process_in_chunks(
+        TranslatablePage.objects.filter(
+            language=language, live=False, expired=False,
+            language_unpublished__isnull=False),
+        publish, chunk_size, progress)
+    # Markers of pages which were published or expired in the meantime
+    LanguageUnpublishedPage.objects.filter(page__language=language).delete()
+    if not language.live:
+        language.live = True
+        language.save()
+    return count
+
+
+def unpublish_language(language, chunk_size=500, progress=None):
+    """Unpublish all pages of a language and take the language offline.
+
+    Like `Page.unpublish`, scheduled publications of the pages are
+    cancelled. The unpublished pages and their live revisions are
+    recorded, for `publish_language`. No page signals are sent.
+
+    :param language: Language instance
+    :return: number of unpublished pages
+
+    """
+    def unpublish(pks):
+        LanguageUnpublishedPage.objects.filter(page_id__in=pks).delete()
+        LanguageUnpublishedPage.objects.bulk_create([
+            LanguageUnpublishedPage(page_id=pk, live_revision_id=revision_id)
+            for pk, revision_id in (
+                Page.objects
+                .filter(pk__in=pks)
+                .values_list('pk', 'live_revision_id'))])
+        Page.objects.filter(pk__in=pks).update(
+            live=False, has_unpublished_changes=True, live_revision=None)
+        PageRevision.objects.filter(page_id__in=pks).update(
+            approved_go_live_at=None)
+        TranslationGroupMember.objects.filter(page_id__in=pks).update(
+            live=False, modified_at=timezone.now())
+
+    count = process_in_chunks(
+        TranslatablePage.objects.filter(language=language, live=True),
+        unpublish, chunk_size, progress)
+    if language.live:
+        language.live = False
+        language.save()
+    return count
+
+
+def move_language(language, target, chunk_size=500, progress=None):
+    """Move all pages of a language into another language.
+
+    Pages whose translation group already has a page in `target` are
+    skipped, they would be duplicate translations.
+
+    :param language: Language instance to move the pages from
+    :param target: Language instance to move the pages to
+    :return: dict with the number of `moved` and `skipped` pages
+
+    """
+    if language.pk == target.pk:
+        raise ValueError("Pages can't be moved into their own language.")
+
+    stats = {'moved': 0, 'skipped': 0}
+
+    def move(pks):
+        rows = dict(
+            TranslatablePage.objects
+            .filter(pk__in=pks)
+            .values_list('pk', 'translation_key'))
+        existing = set(
+            TranslatablePage.objects
+            .filter(language=target, translation_key__in=set(rows.values()))
+            .values_list('translation_key', flat=True))
+        moved = [pk for pk, key in rows.items() if key not in existing]
+        TranslatablePage.objects.filter(pk__in=moved).update(language=target)
+        TranslationGroupMember.objects.filter(page_id__in=moved).update(
+            language=target, language_order=target.order,
+            modified_at=timezone.now())
+        stats['moved'] += len(moved)
+        stats['skipped'] += len(rows) - len(moved)
+
+    process_in_chunks(
+        TranslatablePage.objects.filter(language=language),
+        move, chunk_size, progress)
+    return stats
+
+
+def delete_language(language, chunk_size=500, progress=None):
+    """Delete all pages of a language, and the language itself.
+
+    Pages are deleted with all their descendants, whatever their
+    language.
+
+    :param language: Language instance
+    :return: number of pages of the language which were deleted
+
+    """
+    if language.is_default:
+        raise ValueError("The default language can't be deleted.")
+
+    def delete(pks):
+        # The descendants are deleted too, whatever their language
+        paths = sorted(
+            Page.objects.filter(pk__in=pks).values_list('path', flat=True))
+        if not paths:
+            return
+        subtrees = models.Q()
+        root = None
+        for path in paths:
+            if root is None or not path.startswith(root):
+                root = path
+                subtrees |= models.Q(path__startswith=root)
+        translation_keys = set(
+            TranslatablePage.objects.filter(subtrees)
+            .values_list('translation_key', flat=True))
+        # Also updates `numchild` of the parents. The receivers of the
+        # deleted pages skip the groups within `process_in_chunks`.
+        Page.objects.filter(pk__in=pks).delete()
+        touch_groups(translation_keys)
+
+    count = process_in_chunks(
+        TranslatablePage.objects.filter(language=language),
+        delete, chunk_size, progress)
+    language.delete()
+    return count
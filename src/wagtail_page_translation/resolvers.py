@@ -0,0 +1,518 @@
+"""Batched lookups of translation groups.
+
+The functions in this module work on lightweight `TranslationMember` rows
+instead of (specific) page instances, so resolving a whole translation
+group costs a single query regardless of the page types involved.
+"""
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.urlresolvers import (
+    NoReverseMatch, Resolver404, resolve, reverse)
+from django.db.models import Case, IntegerField, Max, Min, Sum, Value, When
+from django.utils import six, translation
+
+from wagtail.wagtailcore.models import Page, Site
+
+from .cache import (
+    TREE_STAMP_NAME, children_stamp_name, get_cache, get_stamp, get_stamps,
+    group_stamp_name, language_registry, make_key)
+from .conf import get_setting
+from .models import Language, TranslatablePage, TranslationGroupMember
+
+
+TranslationMember = namedtuple('TranslationMember', [
+    'page_id',
+    'translation_key',
+    'language_id',
+    'url_path',
+    'live',
+    'content_type_id',
+])
+
+
+SiteRoot = namedtuple('SiteRoot', [
+    'site_id',
+    'root_page_id',
+    'path',
+    'url_path',
+])
+
+
+CoverageCell = namedtuple('CoverageCell', [
+    'page_id',
+    'title',
+    'path',
+    'live',
+])
+
+
+def to_translation_key(value):
+    """Return `value` as a UUID, the type used by `translation_key`."""
+    if isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def fetch_translation_groups(translation_keys):
+    """Return all members of the given translation groups.
+
+    :param translation_keys: iterable of translation keys
+    :return: dict of translation key to a list of `TranslationMember`
+
+    """
+    groups = dict(
+        (to_translation_key(key), []) for key in translation_keys)
+    if not groups:
+        return groups
+
+    rows = (
+        TranslationGroupMember.objects
+        .filter(translation_key__in=list(groups))
+        .order_by()
+        .values_list('page_id', 'translation_key', 'language_id',
+                     'url_path', 'live', 'content_type_id'))
+    for row in rows:
+        member = TranslationMember(*row)
+        groups[member.translation_key].append(member)
+    return groups
+
+
+def fetch_translation_group(translation_key):
+    """Return all members of a single translation group."""
+    translation_key = to_translation_key(translation_key)
+    return fetch_translation_groups([translation_key])[translation_key]
+
+
+def get_url_from_path(url_path, site_root_paths=None, full_url=False):
+    """Return the URL of a page from its `url_path`.
+
+    This mirrors `Page.url` (or `Page.full_url`) for pages which do not
+    override `get_url_parts`, without needing a page instance.
+
+    :param url_path: `url_path` of the page
+    :param site_root_paths: result of `Site.get_site_root_paths()`, pass it
+        when resolving many URLs in a row
+    :param full_url: Boolean to always include the root URL of the site
+    :return: URL string, or None if the page is not routable
+
+    """
+    if site_root_paths is None:
+        site_root_paths = Site.get_site_root_paths()
+
+    for (site_id, root_path, root_url) in site_root_paths:
+        if url_path.startswith(root_path):
+            page_path = reverse('wagtail_serve',
+                                args=(url_path[len(root_path):],))
+            if (not getattr(settings, 'WAGTAIL_APPEND_SLASH', True) and
+                    page_path != '/'):
+                page_path = page_path.rstrip('/')
+
+            if len(site_root_paths) == 1 and not full_url:
+                return page_path
+            return root_url + page_path
+
+
+def get_subpage_path(content_type_id, view_slug):
+    """Return the subpage path of `view_slug` for a routable page type."""
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    return model.get_resolver().reverse(view_slug)
+
+
+def get_translation_urls(translation_key, view_slug=None, members=None):
+    """Return the URLs of the live translations in live languages.
+
+    :param translation_key: translation key of the group
+    :param view_slug: optional name of a `RoutablePageMixin` subpage view
+        which is appended to every URL
+    :param members: `TranslationMember`s of the group if already fetched
+    :return: dict of language code to URL
+
+    """
+    site_root_paths = Site.get_site_root_paths()
+    languages = Language.objects.live_languages()
+    codes = dict((language.pk, language.code) for language in languages)
+
+    if members is None:
+        members = fetch_translation_group(translation_key)
+
+    urls = {}
+    for member in members:
+        if not member.live or member.language_id not in codes:
+            continue
+        url = get_url_from_path(member.url_path, site_root_paths)
+        if url is None:
+            continue
+        if view_slug and view_slug != 'side_by_side':
+            url += get_subpage_path(member.content_type_id, view_slug)
+        urls[codes[member.language_id]] = url
+    return urls
+
+
+def swap_language_segment(path, languages):
+    """Return a path with its first segment replaced by each language code.
+
+    :param path: path starting with a language code, like `/en/about/`
+    :param languages: Language instances
+    :return: dict of language code to path, empty when the first segment
+        of `path` isn't the code of one of `languages`
+
+    """
+    segments = path.split('/')
+    codes = [language.code for language in languages]
+    if len(segments) < 3 or segments[1] not in codes:
+        return {}
+    urls = {}
+    for code in codes:
+        segments[1] = code
+        urls[code] = '/'.join(segments)
+    return urls
+
+
+def get_view_translation_urls(request):
+    """Return the URLs of the current non-page view in the live languages.
+
+    The URL of the request is resolved once and reversed with every
+    language activated, so views within `i18n_patterns` or with translated
+    URL patterns get the URL of each language. A language is missing from
+    the result when the view can't be reversed in it, or when it isn't one
+    of the `LANGUAGES` Django can activate.
+
+    Views whose URL doesn't depend on the active language, but starts with
+    a language code, like patterns taking the language as an argument or
+    with a fixed `/en/` prefix, get the path of the request with the
+    language code replaced instead.
+
+    The URLs are remembered per view and arguments in a bounded per
+    process cache, which is dropped when a language changes.
+
+    :param request: HttpRequest of the view
+    :return: dict of language code to URL
+
+    """
+    urlconf = getattr(request, 'urlconf', None)
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info, urlconf)
+        except Resolver404:
+            return {}
+    if match.url_name == 'wagtail_serve':
+        # Pages are handled by `get_translation_urls`, a page URL without
+        # a page is a 404
+        return {}
+
+    view = match.view_name if match.url_name else match.func
+    # Captured values are strings, any other values are defaults of the
+    # URL pattern and therefore identified by the view.
+    kwargs = tuple(sorted(
+        (name, value) for name, value in match.kwargs.items()
+        if isinstance(value, six.string_types)))
+    cache_key = (urlconf, view, tuple(match.args), kwargs)
+
+    state = language_registry.get_state()
+    urls = state.view_url_cache.get(cache_key)
+    if urls is None:
+        supported = dict(settings.LANGUAGES)
+        urls = {}
+        for language in state.live:
+            if language.code not in supported:
+                continue
+            with translation.override(language.code):
+                try:
+                    urls[language.code] = reverse(
+                        view, urlconf, args=match.args, kwargs=match.kwargs)
+                except NoReverseMatch:
+                    pass
+        if len(set(urls.values())) <= 1:
+            urls = swap_language_segment(request.path, state.live) or urls
+        state.view_url_cache.set(cache_key, urls)
+    return urls
+
+
+def get_translation_alternates_many(translation_keys):
+    """Return the alternate URLs of many translation groups.
+
+    Alternates are the full URLs of the live translations in live
+    languages, ordered by language position, as used for `hreflang` links.
+    They are cached per translation group until a page of the group or a
+    language changes, or any page is moved. All cache lookups are batched
+    and the groups missing from the cache are fetched with a single query.
+
+    :param translation_keys: iterable of translation keys
+    :return: dict of translation key to a list of (language code, URL)
+
+    """
+    translation_keys = set(to_translation_key(key) for key in translation_keys)
+    if not translation_keys:
+        return {}
+
+    shared_names = [TREE_STAMP_NAME, language_registry.stamp_name]
+    stamps = get_stamps(shared_names + [
+        group_stamp_name(key) for key in translation_keys])
+    shared_stamps = [stamps[name] for name in shared_names]
+    cache_keys = dict(
+        (make_key('alternates', key, stamps[group_stamp_name(key)],
+                  *shared_stamps), key)
+        for key in translation_keys)
+
+    cache = get_cache()
+    alternates = {}
+    for cache_key, value in cache.get_many(list(cache_keys)).items():
+        alternates[cache_keys[cache_key]] = value
+
+    missing = translation_keys.difference(alternates)
+    if missing:
+        site_root_paths = Site.get_site_root_paths()
+        languages = Language.objects.live_languages()
+        positions = dict(
+            (language.pk, position)
+            for position, language in enumerate(languages))
+        codes = dict((language.pk, language.code) for language in languages)
+
+        new_alternates = {}
+        groups = fetch_translation_groups(missing)
+        for translation_key, members in groups.items():
+            members = sorted(
+                (member for member in members
+                 if member.live and member.language_id in codes),
+                key=lambda member: positions[member.language_id])
+            urls = []
+            for member in members:
+                url = get_url_from_path(
+                    member.url_path, site_root_paths, full_url=True)
+                if url is not None:
+                    urls.append((codes[member.language_id], url))
+            new_alternates[translation_key] = urls
+        alternates.update(new_alternates)
+
+        cache.set_many(
+            dict((cache_key, new_alternates[key])
+                 for cache_key, key in cache_keys.items()
+                 if key in new_alternates),
+            get_setting('CACHE_TIMEOUT'))
+    return alternates
+
+
+def get_translation_alternates(translation_key):
+    """Return the alternate URLs of a single translation group."""
+    translation_key = to_translation_key(translation_key)
+    return get_translation_alternates_many(
+        [translation_key])[translation_key]
+
+
+def get_child_urls(parent):
+    """Return the URLs of the live translatable children of a page.
+
+    This is used to redirect from the root page of a site to its language
+    root pages. With several children in a language, the first one in
+    tree order is used. The result is cached until a child of `parent` is
+    published, unpublished or deleted, or until any page is moved.
+
+    :param parent: Page instance
+    :return: dict of language id to URL
+
+    """
+    stamp_names = [TREE_STAMP_NAME, children_stamp_name(parent.path)]
+    stamps = get_stamps(stamp_names)
+    cache_key = make_key(
+        'children', parent.pk, *[stamps[name] for name in stamp_names])
+
+    cache = get_cache()
+    urls = cache.get(cache_key)
+    if urls is None:
+        site_root_paths = Site.get_site_root_paths()
+        rows = (
+            TranslatablePage.objects
+            .live()
+            .child_of(parent)
+            .order_by('path')
+            .values_list('language_id', 'url_path'))
+        urls = {}
+        for language_id, url_path in rows:
+            # The first child of a language in tree order wins
+            if language_id in urls:
+                continue
+            url = get_url_from_path(url_path, site_root_paths)
+            if url is not None:
+                urls[language_id] = url
+        cache.set(cache_key, urls, get_setting('CACHE_TIMEOUT'))
+    return urls
+
+
+def get_subtree_translation_keys(root):
+    """Return the translation groups with a page in the subtree of `root`.
+
+    :param root: Page instance, the root of the subtree (inclusive)
+    :return: queryset of dicts with the `translation_key` and the `path` of
+        the first page of the group in the subtree, ordered by that path
+
+    """
+    return (
+        TranslatablePage.objects
+        .descendant_of(root, inclusive=True)
+        .order_by()
+        .values('translation_key')
+        .annotate(path=Min('path'))
+        .order_by('path'))
+
+
+def fetch_translation_coverage(translation_keys):
+    """Return which languages the given translation groups exist in.
+
+    The groups are aggregated by translation key and language in a single
+    query, no page instances are loaded.
+
+    :param translation_keys: iterable of translation keys
+    :return: dict of translation key to a dict of language id to
+        `CoverageCell`
+
+    """
+    coverage = dict(
+        (to_translation_key(key), {}) for key in translation_keys)
+    if not coverage:
+        return coverage
+
+    rows = (
+        TranslatablePage.objects
+        .filter(translation_key__in=list(coverage))
+        .order_by()
+        .values('translation_key', 'language_id')
+        .annotate(
+            page_id=Max('pk'),
+            title=Max('title'),
+            path=Min('path'),
+            live_pages=Sum(Case(
+                When(live=True, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField())),
+        ))
+    for row in rows:
+        coverage[row['translation_key']][row['language_id']] = CoverageCell(
+            row['page_id'], row['title'], row['path'], row['live_pages'] > 0)
+    return coverage
+
+
+def get_site_roots():
+    """Return the root pages of all sites, deepest first.
+
+    The result is cached until a site is changed or any page is moved.
+
+    :return: list of `SiteRoot`
+
+    """
+    cache = get_cache()
+    cache_key = make_key('site_roots', get_stamp(TREE_STAMP_NAME))
+    site_roots = cache.get(cache_key)
+    if site_roots is None:
+        rows = (
+            Site.objects
+            .order_by()
+            .values_list('pk', 'root_page_id', 'root_page__path',
+                         'root_page__url_path'))
+        site_roots = sorted(
+            (SiteRoot(*row) for row in rows),
+            key=lambda root: len(root.path), reverse=True)
+        cache.set(cache_key, site_roots, get_setting('CACHE_TIMEOUT'))
+    return site_roots
+
+
+def get_site_root(path, site_roots=None):
+    """Return the `SiteRoot` of the site containing the page at `path`.
+
+    :param path: tree path of a page
+    :param site_roots: result of `get_site_roots()`
+    :return: `SiteRoot`, or None if the page is in no site
+
+    """
+    if site_roots is None:
+        site_roots = get_site_roots()
+    for site_root in site_roots:
+        if path.startswith(site_root.path):
+            return site_root
+
+
+def get_translation_parents(pages, language):
+    """Return the parents for translations of `pages` into `language`.
+
+    The parent of a translation is the translation of the parent page
+    within the same site. Pages below a parent which is not translatable,
+    like the root page of a site, keep that parent. When the language has
+    no pages in the site yet, the root page of the site is the parent.
+
+    Independent of the number of pages, this costs a query for the parent
+    pages, one for their translations and one per site without pages in
+    `language`.
+
+    :param pages: iterable of TranslatablePage instances
+    :param language: Language instance
+    :return: dict of page id to the parent Page instance, or None if the
+        parent page has no translation in `language`
+
+    """
+    pages = list(pages)
+    if not pages:
+        return {}
+
+    site_roots = get_site_roots()
+    parent_paths = dict(
+        (page.pk, page.path[:-Page.steplen]) for page in pages)
+
+    # Translation keys of the translatable parents, the other parents
+    # are shared by all languages.
+    parent_keys = dict(
+        TranslatablePage.objects
+        .filter(path__in=set(parent_paths.values()))
+        .order_by()
+        .values_list('path', 'translation_key'))
+    shared_parents = {}
+    shared_paths = set(parent_paths.values()).difference(parent_keys)
+    if shared_paths:
+        shared_parents = dict(
+            (parent.path, parent)
+            for parent in Page.objects.filter(path__in=shared_paths))
+
+    translations = {}
+    if parent_keys:
+        for translation in TranslatablePage.objects.filter(
+                translation_key__in=set(parent_keys.values()),
+                language=language):
+            translations[translation.translation_key] = translation
+
+    parents = {}
+    empty_site_roots = {}
+    for page in pages:
+        parent_path = parent_paths[page.pk]
+        if parent_path not in parent_keys:
+            parents[page.pk] = shared_parents.get(parent_path)
+            continue
+
+        site_root = get_site_root(page.path, site_roots)
+        parent = translations.get(parent_keys[parent_path])
+        if parent is not None and (
+                site_root is None or parent.path.startswith(site_root.path)):
+            parents[page.pk] = parent
+            continue
+
+        parents[page.pk] = None
+        if site_root is not None:
+            if site_root not in empty_site_roots:
+                empty_site_roots[site_root] = not (
+                    TranslatablePage.objects
+                    .filter(language=language,
+                            path__startswith=site_root.path)
+                    .exists())
+            if empty_site_roots[site_root]:
+                parents[page.pk] = site_root
+
+    root_page_ids = set(
+        parent.root_page_id for parent in parents.values()
+        if isinstance(parent, SiteRoot))
+    if root_page_ids:
+        root_pages = Page.objects.in_bulk(root_page_ids)
+        for page_id, parent in parents.items():
+            if isinstance(parent, SiteRoot):
+                parents[page_id] = root_pages[parent.root_page_id]
+    return parents
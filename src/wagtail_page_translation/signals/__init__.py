@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent for every measured operation when instrumentation is enabled, with
+# the `duration` in milliseconds and the number of `queries`.
+operation_measured = Signal(providing_args=['name', 'duration', 'queries'])
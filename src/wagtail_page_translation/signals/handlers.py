@@ -1,13 +1,220 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from wagtail.wagtailadmin.signals import init_new_page
+from wagtail.wagtailcore.models import Page, PageViewRestriction, Site
+from wagtail.wagtailcore.signals import page_published, page_unpublished
 
-from ..models import TranslatablePage
+from ..cache import (
+    in_bulk_invalidation, invalidate_children, invalidate_translation_groups,
+    invalidate_tree, language_registry)
+from ..members import (
+    MEMBER_FIELDS, move_members, rebuild_members, save_members, touch_groups,
+    update_language)
+from ..memo import get_memo
+from ..models import Language, TranslatablePage
+from ..staleness import mark_source_changed, mark_synced
 
 
 @receiver(init_new_page)
 def add_language_from_parent(sender, **kwargs):
-    if (isinstance(kwargs['parent'], TranslatablePage) and
-            isinstance(kwargs['page'], TranslatablePage)):
-        if kwargs['parent'] and kwargs['parent'].language:
-            kwargs['page'].language = kwargs['parent'].language
+    # Languages come from the registry, opening the form costs no query
+    page = kwargs['page']
+    parent = kwargs['parent']
+    if not isinstance(page, TranslatablePage):
+        return
+    if isinstance(parent, TranslatablePage) and parent.language_id:
+        page.language_id = parent.language_id
+    elif page.language_id is None:
+        default_language = Language.objects.default()
+        if default_language is not None:
+            page.language_id = default_language.pk
+    page._cache_language()
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_language_registry(sender, **kwargs):
+    language_registry.invalidate()
+
+
+@receiver(post_save, sender=Language)
+def update_member_language(sender, instance, **kwargs):
+    update_language(instance)
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_site_urls(sender, **kwargs):
+    invalidate_tree()
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def touch_restricted_groups(sender, instance, **kwargs):
+    # The API leaves out the pages below a view restriction, their groups
+    # change for clients syncing them
+    invalidate_tree()
+    if in_bulk_invalidation():
+        return
+    path = (
+        Page.objects.filter(pk=instance.page_id)
+        .values_list('path', flat=True).first())
+    if path is not None:
+        touch_groups(
+            TranslatablePage.objects
+            .filter(path__startswith=path)
+            .values_list('translation_key', flat=True))
+
+
+def clear_translation_memo(sender, instance, **kwargs):
+    memo = get_memo()
+    if memo is not None:
+        memo.clear()
+
+
+def invalidate_page(page):
+    if isinstance(page, TranslatablePage):
+        invalidate_translation_groups([page.translation_key])
+        invalidate_children([page.path[:-page.steplen]])
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_published_page(sender, instance, **kwargs):
+    invalidate_page(instance)
+
+
+@receiver(page_unpublished)
+def update_unpublished_member(sender, instance, **kwargs):
+    # Expired pages are unpublished with a queryset update. Pages are also
+    # unpublished before being deleted, bulk operations update the members
+    # of the pages they handle once per chunk.
+    if in_bulk_invalidation():
+        return
+    if isinstance(instance, TranslatablePage):
+        rebuild_members(TranslatablePage.objects.filter(pk=instance.pk))
+
+
+@receiver(page_published)
+def update_translation_sources(sender, instance, **kwargs):
+    if isinstance(instance, TranslatablePage):
+        mark_source_changed(instance)
+        mark_synced(instance)
+
+
+# Fields of `MEMBER_FIELDS` as passed in `update_fields`
+MEMBER_FIELD_NAMES = set(
+    name[:-3] if name.endswith('_id') else name for name in MEMBER_FIELDS)
+
+
+def update_member(sender, instance, created=False, update_fields=None,
+                  **kwargs):
+    if (update_fields is not None and
+            not MEMBER_FIELD_NAMES.intersection(update_fields)):
+        return
+    save_members([instance])
+
+    # Pages created live, like copies made with `keep_live`, are published
+    # without `page_published` being sent
+    old_member = getattr(instance, '_old_member', None)
+    instance._old_member = None
+    if created:
+        if instance.live:
+            invalidate_page(instance)
+    elif old_member is not None and old_member != (
+            instance.translation_key, instance.language_id, instance.live):
+        invalidate_translation_groups([old_member[0]])
+        invalidate_page(instance)
+
+
+def invalidate_deleted_page(sender, instance, **kwargs):
+    invalidate_page(instance)
+
+
+def touch_deleted_page_group(sender, instance, **kwargs):
+    # The remaining translations report the group as changed, a group
+    # without translations left is recorded as deleted. Bulk deletes touch
+    # the groups once per chunk.
+    if in_bulk_invalidation():
+        return
+    touch_groups([instance.translation_key])
+
+
+# Fields of translatable pages whose change moves a page to another group
+# or changes what its group lists
+MEMBER_STATE_FIELDS = ['translation_key', 'language_id', 'live']
+
+
+def detect_page_changes(sender, instance, update_fields=None, **kwargs):
+    # Moving a page or changing its slug changes the URL of all its
+    # descendants, which are updated without sending any signal.
+    instance._url_path_changed = False
+    instance._old_member = None
+    if not instance.pk:
+        return
+    model = Page
+    fields = ['url_path']
+    if isinstance(instance, TranslatablePage):
+        model = TranslatablePage
+        fields += MEMBER_STATE_FIELDS
+    if update_fields is not None:
+        fields = [
+            name for name in fields
+            if (name in update_fields or
+                name.endswith('_id') and name[:-3] in update_fields)]
+        if not fields:
+            return
+    # Fields which aren't saved are taken from the instance
+    row = (
+        model.objects.filter(pk=instance.pk)
+        .values_list(*fields).first())
+    if row is None:
+        return
+    old = dict(zip(fields, row))
+    if 'url_path' in old:
+        instance._url_path_changed = old['url_path'] != instance.url_path
+        instance._old_url_path = old['url_path']
+    if set(MEMBER_STATE_FIELDS).intersection(old):
+        instance._old_member = tuple(
+            old.get(name, getattr(instance, name))
+            for name in MEMBER_STATE_FIELDS)
+
+
+def invalidate_moved_pages(sender, instance, **kwargs):
+    if not getattr(instance, '_url_path_changed', False):
+        return
+    instance._url_path_changed = False
+    invalidate_tree()
+    move_members(instance._old_url_path, instance.url_path)
+    translation_keys = (
+        TranslatablePage.objects
+        .filter(path__startswith=instance.path)
+        .order_by()
+        .values_list('translation_key', flat=True)
+        .distinct())
+    invalidate_translation_groups(translation_keys)
+
+
+def connect_page_receivers():
+    """Connect the receivers of page changes to the page models.
+
+    Receivers without a sender would run for the saves and deletes of all
+    models, and a `post_delete` receiver prevents Django from deleting
+    the rows of any model without loading them. Pages of any type change
+    the URLs of their translatable descendants, the other receivers only
+    concern translatable pages.
+    """
+    for model in apps.get_models():
+        if not issubclass(model, Page):
+            continue
+        pre_save.connect(detect_page_changes, sender=model)
+        post_save.connect(invalidate_moved_pages, sender=model)
+        if not issubclass(model, TranslatablePage):
+            continue
+        post_save.connect(clear_translation_memo, sender=model)
+        post_save.connect(update_member, sender=model)
+        post_delete.connect(clear_translation_memo, sender=model)
+        post_delete.connect(invalidate_deleted_page, sender=model)
+        post_delete.connect(touch_deleted_page_group, sender=model)
@@ -0,0 +1,94 @@
+"""Sitemap with `hreflang` alternates for translatable pages.
+
+Usage in the URL configuration of a project::
+
+    from wagtail_page_translation.sitemaps import sitemap
+
+    url(r'^sitemap\.xml$', sitemap),
+
+"""
+from django.contrib.sitemaps import views as sitemap_views
+
+from wagtail.contrib.wagtailsitemaps.sitemap_generator import Sitemap
+from wagtail.contrib.wagtailsitemaps.views import prepare_sitemaps
+from wagtail.wagtailcore.models import Site
+
+from .models import Language, TranslatablePage
+from .resolvers import get_translation_alternates_many
+
+
+class TranslatableSitemap(Sitemap):
+    """Sitemap of the live translatable pages of a site.
+
+    Items are rows rather than page instances, ordered by translation key
+    so that the members of a translation group end up on the same sitemap
+    page. The alternates of all groups on a sitemap page are resolved with
+    a few batched cache lookups, and at most one query for the groups
+    missing from the cache, in chunks of `chunk_size` items.
+    """
+
+    chunk_size = 1000
+
+    def items(self):
+        languages = Language.objects.live_languages()
+        fields = [
+            'pk', 'translation_key', 'language_id',
+            'latest_revision_created_at']
+        # Older Wagtail versions don't record the last publication
+        if hasattr(TranslatablePage, 'last_published_at'):
+            fields.append('last_published_at')
+        return (
+            TranslatablePage.objects
+            .descendant_of(self.site.root_page, inclusive=True)
+            .live()
+            .public()
+            .filter(language_id__in=[language.pk for language in languages])
+            .order_by('translation_key', 'language_id')
+            .values(*fields))
+
+    def lastmod(self, item):
+        return (item.get('last_published_at') or
+                item['latest_revision_created_at'])
+
+    def _urls(self, page, protocol, domain):
+        codes = dict(
+            (language.pk, language.code)
+            for language in Language.objects.live_languages())
+        items = self.paginator.page(page).object_list
+
+        urls = []
+        last_mods = set()
+        for start in range(0, len(items), self.chunk_size):
+            chunk = items[start:start + self.chunk_size]
+            alternates = get_translation_alternates_many(
+                item['translation_key'] for item in chunk)
+
+            for item in chunk:
+                group = alternates[item['translation_key']]
+                location = dict(group).get(codes[item['language_id']])
+                if location is None:
+                    # The page is not routable
+                    continue
+                lastmod = self.lastmod(item)
+                urls.append({
+                    'item': item,
+                    'location': location,
+                    'lastmod': lastmod,
+                    'alternates': group,
+                })
+                last_mods.add(lastmod)
+
+        if last_mods and None not in last_mods:
+            self.latest_lastmod = max(last_mods)
+        return urls
+
+
+def sitemap(request, sitemaps=None, **kwargs):
+    """Serve a sitemap including the translations of every page."""
+    if sitemaps:
+        sitemaps = prepare_sitemaps(request, sitemaps)
+    else:
+        sitemaps = {'wagtail': TranslatableSitemap(request.site)}
+    kwargs.setdefault(
+        'template_name', 'wagtail_page_translation/sitemap.xml')
+    return sitemap_views.sitemap(request, sitemaps, **kwargs)
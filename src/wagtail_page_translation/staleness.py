@@ -0,0 +1,65 @@
+"""Tracking of translations whose source page changed.
+
+Every translation made by copying a page has a `TranslationSource` row.
+Publishing the source marks its translations as stale with a single
+update, so finding stale translations is an indexed lookup instead of a
+comparison of revisions.
+"""
+from django.utils import timezone
+
+from .models import TranslationSource
+
+
+def mark_synced(translation, source=None, now=None):
+    """Mark a translation as up to date with its source.
+
+    :param translation: TranslatablePage instance of the translation
+    :param source: TranslatablePage the translation was made from, None to
+        keep the current source
+    :param now: time of the synchronization, defaults to now
+    :return: number of marked translations
+
+    """
+    now = now or timezone.now()
+    if source is None:
+        return TranslationSource.objects.filter(
+            translation_id=translation.pk).update(
+            synced_at=now, changed_at=None)
+
+    TranslationSource.objects.update_or_create(
+        translation_id=translation.pk,
+        defaults={
+            'source_id': source.pk,
+            'synced_at': now,
+            'changed_at': None,
+        })
+    return 1
+
+
+def insert_sources(pages, now=None):
+    """Create the markers of new translations inserted in bulk.
+
+    :param pages: TranslatablePage instances with the primary key of their
+        source page in `_source_id`
+    :param now: time of the synchronization, defaults to now
+
+    """
+    now = now or timezone.now()
+    TranslationSource.objects.bulk_create([
+        TranslationSource(
+            translation_id=page.pk, source_id=page._source_id,
+            synced_at=now)
+        for page in pages])
+
+
+def mark_source_changed(source, now=None):
+    """Mark the up to date translations of a changed page as stale.
+
+    :param source: TranslatablePage instance which changed
+    :param now: time of the change, defaults to now
+    :return: number of translations which became stale
+
+    """
+    return TranslationSource.objects.filter(
+        source_id=source.pk, changed_at__isnull=True).update(
+        changed_at=now or timezone.now())
@@ -1,74 +1,129 @@
 from django import template
+from django.utils.translation import get_language
 
-from ..models import Language, TranslatablePage
+from ..cache import (
+    get_cache, get_stamps, group_stamp_name, language_registry, make_key)
+from ..conf import get_setting
+from ..instrumentation import measure
+from ..models import Language
+from ..resolvers import get_translation_urls, get_view_translation_urls
 
 
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
+@measure('get_languages')
 def get_languages(context, record):
 
+    # for non Wagtail pages
+    if not record:
+        return get_view_languages(context)
+
+    # for Wagtail pages
+    view_slug = None
+    if 'view_slug' in context:
+        view_slug = context['view_slug']
+
+    timeout = get_setting('LANGUAGE_SWITCHER_CACHE_TIMEOUT')
+    if not timeout or not hasattr(record, 'translation_key'):
+        return get_page_languages(record, view_slug)
+
+    cache_key = get_switcher_cache_keys([record], view_slug)[0]
+    cache = get_cache()
+    languages = cache.get(cache_key)
+    if languages is None:
+        languages = get_page_languages(record, view_slug)
+        cache.set(cache_key, languages, timeout)
+    return languages
+
+
+def get_switcher_cache_keys(records, view_slug=None):
+    """Return the cache keys of the language switchers of pages.
+
+    Switchers are cached per translation group, a new stamp of the group
+    or of the languages makes the cached value unreachable. The key also
+    depends on the active language.
+
+    :param records: pages, or any objects with a `translation_key` and a
+        `language_id`
+    :param view_slug: optional name of a `RoutablePageMixin` subpage view
+    :return: list of cache keys, in the order of `records`
+
+    """
+    records = list(records)
+    stamps = get_stamps([language_registry.stamp_name] + [
+        group_stamp_name(record.translation_key) for record in records])
+    return [
+        make_key(
+            'switcher', record.translation_key, record.language_id,
+            view_slug or '', get_language(),
+            stamps[language_registry.stamp_name],
+            stamps[group_stamp_name(record.translation_key)])
+        for record in records]
+
+
+def get_view_languages(context):
     # generate list of links for each language
     languages = {
         'list': []
     }
 
-    live_languages = Language.objects.all().filter(live=True)
+    request = context['request']
+    translated_urls = get_view_translation_urls(request)
+    query_string = request.META.get('QUERY_STRING')
 
-    # for non Wagtail pages
-    if not record:
-        url_split = context['request'].path.split('/')
-        current_language = context['LANGUAGE_CODE']
-        for language in live_languages:
-            # create special record for current language
-            if language.code == current_language:
-                languages['current'] = {
-                    'code': language.code,
-                    'name': str(language)}
-            url_split[1] = language.code
+    current_language = context['LANGUAGE_CODE']
+    for language in Language.objects.live_languages():
+        # create special record for current language
+        if language.code == current_language:
+            languages['current'] = {
+                'code': language.code,
+                'name': str(language)}
+        if language.code in translated_urls:
+            url = translated_urls[language.code]
+            if query_string:
+                url += '?' + query_string
             languages['list'].append({
                 'is_translated': True,
                 'code': language.code,
                 'name': str(language),
-                'url': '/'.join(url_split),
+                'url': url,
             })
-        return languages
-
-    # for Wagtail pages
-    view_slug = None
-    if 'view_slug' in context:
-        view_slug = context['view_slug']
+        else:
+            # use frontpage when the view is not available in that language
+            languages['list'].append({
+                'is_translated': None,
+                'code': language.code,
+                'name': str(language),
+                'url': '/%s/' % language.code})
+    return languages
 
-    pages = []
-    if hasattr(record, 'language'):
-        pages = TranslatablePage.objects.live(). \
-            filter(translation_key=record.translation_key).specific()
 
-    available_languages = []
-    translated_pages = {}
+def get_page_languages(record, view_slug=None, translated_urls=None):
+    # generate list of links for each language
+    languages = {
+        'list': []
+    }
 
-    for page in pages:
-        available_languages.append(page.language)
-        # translated_pages[page.language] = page.url
-        translated_pages[page.language.code] = page.url
-        if view_slug:
-            if view_slug != 'side_by_side':
-                translated_pages[page.language.code] += page.reverse_subpage(
-                    view_slug)
+    if translated_urls is None:
+        translated_urls = {}
+        if hasattr(record, 'translation_key'):
+            translated_urls = get_translation_urls(
+                record.translation_key, view_slug=view_slug)
 
-    for language in live_languages:
+    for language in Language.objects.live_languages():
         # create special record for current language
-        if language == record.language:
+        if language.pk == getattr(record, 'language_id', None):
             languages['current'] = {
                 'code': language.code,
                 'name': str(language)}
-        if language in available_languages:
+        if language.code in translated_urls:
             languages['list'].append({
                 'is_translated': True,
                 'code': language.code,
                 'name': str(language),
-                'url': translated_pages[language.code],
+                'url': translated_urls[language.code],
             })
         else:
             # use frontpage when record for that language is not translated
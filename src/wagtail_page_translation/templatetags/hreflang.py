@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..models import Language
+from ..resolvers import get_translation_alternates
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def hreflang_links(page):
+    """Render `<link rel="alternate" hreflang="...">` tags for a page.
+
+    A link is rendered for every live translation in a live language,
+    including the page itself, and an `x-default` link for the translation
+    in the default language.
+
+    Usage::
+
+        {% load hreflang %}
+        {% hreflang_links page %}
+
+    """
+    if not hasattr(page, 'translation_key'):
+        return ''
+
+    alternates = get_translation_alternates(page.translation_key)
+    links = format_html_join(
+        '\n', '<link rel="alternate" hreflang="{}" href="{}">', alternates)
+
+    default_language = Language.objects.default()
+    for code, url in alternates:
+        if default_language and code == default_language.code:
+            links += format_html(
+                '\n<link rel="alternate" hreflang="x-default" href="{}">',
+                url)
+            break
+    return links
@@ -0,0 +1,11 @@
+from django.conf.urls import url
+
+from ..views import api
+
+
+app_name = 'wagtail_page_translation_api'
+
+urlpatterns = [
+    url(r'^pages/(\d+)/$', api.page_translations, name='page_translations'),
+    url(r'^groups/$', api.changed_groups, name='changed_groups'),
+]
@@ -10,4 +10,5 @@ urlpatterns = [
     url(r'^add/$', language.Create.as_view(), name='add'),
     url(r'^(\d+)/$', language.Edit.as_view(), name='edit'),
     url(r'^(\d+)/delete/$', language.Delete.as_view(), name='delete'),
+    url(r'^(\d+)/pages/(\w+)/$', language.bulk_action, name='bulk_action'),
 ]
@@ -7,6 +7,8 @@ app_name = 'wagtail_page_translation'
 
 urlpatterns = [
     url(r'^(\d+)/$', translation.revisions_index, name='index'),
+    url(r'^(\d+)/coverage/$', translation.coverage, name='coverage'),
+    url(r'^(\d+)/stale/$', translation.stale, name='stale'),
     url(r'^(\d+)/add-translation/([-\w]+)/$', translation.add_translation,
         name='add_translation'),
 ]
@@ -0,0 +1,29 @@
+def iterate_in_chunks(queryset, chunk_size=1000, key='pk'):
+    """Yield the results of `queryset` as lists of at most `chunk_size`.
+
+    Chunks are fetched with keyset pagination on `key`, which must be
+    unique and is used for ordering, so memory use does not grow with the
+    size of the queryset and late chunks are as cheap as early ones.
+    Works with model, `values` and `values_list` querysets as long as
+    `key` is part of the results, as first column for `values_list`.
+    """
+    queryset = queryset.order_by(key)
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(**{'%s__gt' % key: last})
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        if isinstance(last, dict):
+            last = last[key]
+        elif isinstance(last, tuple):
+            last = last[0]
+        else:
+            last = getattr(last, key)
@@ -0,0 +1,334 @@
+"""Read-only JSON API of the translation groups.
+
+Add it to your URL configuration with::
+
+    url(r'^api/translations/', include('wagtail_page_translation.urls.api')),
+
+Only live pages in live languages are listed, without the pages with view
+restrictions, like in the sitemaps. Responses carry an `ETag`
+and a `Last-Modified` header derived from the version stamps of the
+translation groups, so clients can revalidate them with conditional
+requests and get a 304 without any page being loaded.
+
+Clients syncing the groups with `groups/?since=` should send the
+`next_since` of their last listing as the next `since`, rather than the
+time of their request. Changes are timed when they are made, not when
+their transaction commits, and `next_since` lies
+`WAGTAIL_PAGE_TRANSLATION_API_SINCE_MARGIN` seconds before the latest
+change to include changes committed late. Groups listed again are
+simply repeated.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition, require_GET
+
+from wagtail.wagtailcore.models import PageViewRestriction, Site
+
+from ..cache import (
+    TREE_STAMP_NAME, get_stamps, group_stamp_name, language_registry)
+from ..conf import get_setting
+from ..models import DeletedTranslationGroup, TranslationGroupMember
+from ..resolvers import get_url_from_path, to_translation_key
+
+
+# Number of groups listed per response by default, and at most
+GROUPS_LIMIT = 100
+GROUPS_MAX_LIMIT = 1000
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def stamp_to_datetime(stamp):
+    """Return the time of a version stamp, which is in microseconds."""
+    return datetime.utcfromtimestamp(stamp / 1000000.0)
+
+
+def get_restricted_paths():
+    """Return the tree paths of the pages with view restrictions."""
+    return tuple(
+        PageViewRestriction.objects
+        .values_list('page__path', flat=True)
+        .distinct())
+
+
+def serialize_groups(translation_keys):
+    """Return the translations of groups, as needed by the API.
+
+    Groups whose last page was deleted are returned without translations.
+    Like `PageQuerySet.public`, pages below a page with view restrictions
+    are left out.
+
+    :param translation_keys: list of translation keys
+    :return: list of dicts, in the order of `translation_keys`
+
+    """
+    languages = language_registry.get_state().live
+    codes = dict((language.pk, language.code) for language in languages)
+    site_root_paths = Site.get_site_root_paths()
+    restricted_paths = get_restricted_paths()
+
+    groups = OrderedDict(
+        (key, {'translation_key': key, 'modified_at': None,
+               'translations': []})
+        for key in translation_keys)
+    rows = (
+        TranslationGroupMember.objects
+        .filter(translation_key__in=translation_keys)
+        .order_by('language_order')
+        .values_list('translation_key', 'page_id', 'language_id',
+                     'url_path', 'live', 'modified_at', 'page__title',
+                     'page__path'))
+    for (translation_key, page_id, language_id, url_path, live, modified_at,
+         title, path) in rows:
+        group = groups[translation_key]
+        # Changes of pages which are not listed count as well, a page may
+        # have just been unpublished
+        if group['modified_at'] is None or modified_at > group['modified_at']:
+            group['modified_at'] = modified_at
+        if not live or language_id not in codes:
+            continue
+        if restricted_paths and path.startswith(restricted_paths):
+            continue
+        url = get_url_from_path(url_path, site_root_paths, full_url=True)
+        if url is None:
+            continue
+        group['translations'].append({
+            'id': page_id,
+            'language': codes[language_id],
+            'title': title,
+            'url': url,
+        })
+
+    deleted = [
+        key for key, group in groups.items() if group['modified_at'] is None]
+    if deleted:
+        for translation_key, deleted_at in (
+                DeletedTranslationGroup.objects
+                .filter(translation_key__in=deleted)
+                .values_list('translation_key', 'deleted_at')):
+            groups[translation_key]['modified_at'] = deleted_at
+    return list(groups.values())
+
+
+def get_page_group_state(request, page_id):
+    """Return the translation key of a page and the stamps of its group.
+
+    The state is computed once per request, for both the `ETag` and the
+    `Last-Modified` header.
+    """
+    if not hasattr(request, '_translation_group_state'):
+        translation_key = (
+            TranslationGroupMember.objects
+            .filter(page_id=page_id)
+            .values_list('translation_key', flat=True)
+            .first())
+        if translation_key is None:
+            raise Http404
+        names = [
+            group_stamp_name(translation_key),
+            language_registry.stamp_name,
+            TREE_STAMP_NAME,
+        ]
+        stamps = get_stamps(names)
+        request._translation_group_state = (
+            translation_key, [stamps[name] for name in names])
+    return request._translation_group_state
+
+
+def page_translations_etag(request, page_id):
+    translation_key, stamps = get_page_group_state(request, page_id)
+    return make_etag(translation_key, *stamps)
+
+
+def page_translations_last_modified(request, page_id):
+    translation_key, stamps = get_page_group_state(request, page_id)
+    return stamp_to_datetime(max(stamps))
+
+
+@require_GET
+@condition(etag_func=page_translations_etag,
+           last_modified_func=page_translations_last_modified)
+def page_translations(request, page_id):
+    """Return the translations of a page, including the page itself."""
+    translation_key, stamps = get_page_group_state(request, page_id)
+    return JsonResponse(serialize_groups([translation_key])[0])
+
+
+def parse_time(request, name):
+    """Return a time parameter of a request, None if it is missing.
+
+    :raises ValueError: if the parameter is invalid
+
+    """
+    value = request.GET.get(name)
+    if not value:
+        return None
+    value = parse_datetime(value)
+    if value is None:
+        raise ValueError("'%s' must be an ISO 8601 date and time." % name)
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    elif not settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.make_naive(value)
+    return value
+
+
+def parse_groups_query(request):
+    """Return the `since` time, the `after` cursor and the `limit`.
+
+    :raises ValueError: if a parameter is invalid
+
+    """
+    since = parse_time(request, 'since')
+
+    limit = int(request.GET.get('limit') or GROUPS_LIMIT)
+    if not 0 < limit <= GROUPS_MAX_LIMIT:
+        raise ValueError(
+            "'limit' must be between 1 and %d." % GROUPS_MAX_LIMIT)
+
+    after = request.GET.get('after')
+    if after:
+        try:
+            after = to_translation_key(after)
+        except ValueError:
+            raise ValueError("'after' must be a translation key.")
+    return since, after or None, limit
+
+
+def get_changed_groups_state(request):
+    """Return the time of the last change and the stamps of all groups."""
+    if not hasattr(request, '_translation_groups_state'):
+        times = [
+            TranslationGroupMember.objects.aggregate(
+                time=Max('modified_at'))['time'],
+            DeletedTranslationGroup.objects.aggregate(
+                time=Max('deleted_at'))['time'],
+        ]
+        times = [time for time in times if time is not None]
+        modified_at = max(times) if times else None
+        stamps = get_stamps([language_registry.stamp_name, TREE_STAMP_NAME])
+        request._translation_groups_state = (
+            modified_at, sorted(stamps.values()))
+    return request._translation_groups_state
+
+
+def changed_groups_etag(request):
+    modified_at, stamps = get_changed_groups_state(request)
+    return make_etag(
+        request.GET.urlencode(), modified_at and modified_at.isoformat(),
+        *stamps)
+
+
+def get_next_since(request):
+    """Return the `since` of the next sync, for the `next_since` field.
+
+    The first response of a listing computes it from the last change,
+    following responses pass it on, so changes made while the pages of a
+    listing are fetched are listed by the next sync.
+
+    :raises ValueError: if the `next_since` parameter is invalid
+
+    """
+    next_since = parse_time(request, 'next_since')
+    if next_since is None:
+        modified_at, stamps = get_changed_groups_state(request)
+        if modified_at is not None:
+            next_since = modified_at - timedelta(
+                seconds=get_setting('API_SINCE_MARGIN'))
+    return next_since
+
+
+def get_changed_keys(since, after, limit):
+    """Return the first translation keys of the changed groups.
+
+    :return: sorted list of up to `limit` translation keys
+
+    """
+    members = TranslationGroupMember.objects.order_by()
+    deleted = DeletedTranslationGroup.objects.order_by()
+    if since is not None:
+        members = members.filter(modified_at__gt=since)
+        deleted = deleted.filter(deleted_at__gt=since)
+    if after is not None:
+        members = members.filter(translation_key__gt=after)
+        deleted = deleted.filter(translation_key__gt=after)
+    translation_keys = set(
+        members
+        .values_list('translation_key', flat=True)
+        .distinct()
+        .order_by('translation_key')[:limit])
+    translation_keys.update(
+        deleted
+        .values_list('translation_key', flat=True)
+        .order_by('translation_key')[:limit])
+    return sorted(translation_keys)[:limit]
+
+
+def changed_groups_last_modified(request):
+    modified_at, stamps = get_changed_groups_state(request)
+    if modified_at is None:
+        return None
+    # Without USE_TZ, times are naive in the default time zone
+    if timezone.is_naive(modified_at):
+        modified_at = timezone.make_aware(modified_at)
+    return max(
+        timezone.make_naive(modified_at, timezone.utc),
+        stamp_to_datetime(max(stamps)))
+
+
+@require_GET
+@condition(etag_func=changed_groups_etag,
+           last_modified_func=changed_groups_last_modified)
+def changed_groups(request):
+    """List the translation groups changed since a given time.
+
+    Groups are ordered by translation key and paginated with the `after`
+    cursor, the `next` URL of a response points to the following groups.
+    Deleted groups are listed without translations. `next_since` is the
+    `since` to send for the next sync. Responses are streamed, the groups
+    are loaded in chunks while the response is written.
+    """
+    try:
+        since, after, limit = parse_groups_query(request)
+        next_since = get_next_since(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    translation_keys = get_changed_keys(since, after, limit + 1)
+
+    encoder = DjangoJSONEncoder()
+    next_url = None
+    if len(translation_keys) > limit:
+        translation_keys = translation_keys[:limit]
+        query = request.GET.copy()
+        query['after'] = str(translation_keys[-1])
+        if next_since is not None:
+            query['next_since'] = next_since.isoformat()
+        next_url = request.build_absolute_uri(
+            '%s?%s' % (request.path, query.urlencode()))
+
+    def stream():
+        yield '{"groups": ['
+        separator = ''
+        for start in range(0, len(translation_keys), GROUPS_LIMIT):
+            chunk = translation_keys[start:start + GROUPS_LIMIT]
+            for group in serialize_groups(chunk):
+                yield separator + encoder.encode(group)
+                separator = ', '
+        yield '], "next": %s, "next_since": %s}' % (
+            json.dumps(next_url), encoder.encode(next_since))
+
+    return StreamingHttpResponse(
+        stream(), content_type='application/json')
@@ -1,11 +1,17 @@
 from __future__ import absolute_import, unicode_literals
 
-from django.utils.translation import ugettext_lazy
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.translation import ugettext as _, ugettext_lazy
+from wagtail.wagtailadmin import messages
 from wagtail.wagtailadmin.views import generic
 from wagtail.wagtailcore.permission_policies import ModelPermissionPolicy
 
-from ..forms import LanguageForm
-from ..models import Language
+from ..forms import LanguageForm, MoveLanguageForm
+from ..models import Language, TranslatablePage
+from ..operations import (
+    delete_language, move_language, publish_language, unpublish_language)
 
 language_permission_policy = ModelPermissionPolicy(Language)
 
@@ -57,3 +63,60 @@ class Delete(generic.DeleteView):
     confirmation_message = ugettext_lazy(
         "Are you sure you want to delete this language?")
     header_icon = 'folder-open-1'
+
+
+BULK_ACTIONS = {
+    'publish': ugettext_lazy("Publish all pages"),
+    'unpublish': ugettext_lazy("Unpublish all pages"),
+    'move': ugettext_lazy("Move all pages"),
+    'delete': ugettext_lazy("Delete all pages"),
+}
+
+
+def bulk_action(request, pk, action):
+    """Publish, unpublish, move or delete all pages of a language.
+
+    The pages are handled in chunks within the request, use the
+    `language_pages` management command for very large sites.
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    if action not in BULK_ACTIONS:
+        raise Http404
+
+    language = get_object_or_404(Language, pk=pk)
+    form = None
+    if action == 'move':
+        form = MoveLanguageForm(request.POST or None, language=language)
+
+    if request.method == 'POST' and (form is None or form.is_valid()):
+        try:
+            if action == 'publish':
+                count = publish_language(language)
+                message = _("{0} pages published.").format(count)
+            elif action == 'unpublish':
+                count = unpublish_language(language)
+                message = _("{0} pages unpublished.").format(count)
+            elif action == 'move':
+                stats = move_language(language, form.cleaned_data['target'])
+                message = _(
+                    "{moved} pages moved, {skipped} skipped as they are "
+                    "already translated.").format(**stats)
+            else:
+                count = delete_language(language)
+                message = _("{0} pages deleted.").format(count)
+        except ValueError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, message)
+            return redirect('wagtail_page_translation_languages:index')
+
+    return render(
+        request, 'wagtail_page_translation/languages/bulk_action.html', {
+            'language': language,
+            'action': action,
+            'title': BULK_ACTIONS[action],
+            'form': form,
+            'page_count': TranslatablePage.objects.filter(
+                language=language).count(),
+        })
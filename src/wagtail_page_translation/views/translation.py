@@ -5,20 +5,29 @@ from django.utils.translation import ugettext as _
 from wagtail.wagtailadmin import messages
 from wagtail.wagtailadmin.views.pages import get_valid_next_url_from_request
 from wagtail.wagtailcore.models import Page
+from wagtail.utils.pagination import paginate
 
-from ..models import Language, TranslatablePage
+from ..conf import get_setting
+from ..models import Language, TranslatablePage, TranslationJob
 from ..forms import AddTranslationForm
+from ..instrumentation import measure
+from ..jobs import enqueue_translation
+from ..operations import translate_subtree
+from ..resolvers import (
+    fetch_translation_coverage, get_subtree_translation_keys)
 
 
+@measure('admin.add_translation')
 def add_translation(request, page_id, language_code):
     page = TranslatablePage.objects.get(id=page_id)
 
-    new_language = Language.objects.get(code=language_code)
+    new_language = Language.objects.get_by_code(language_code)
 
-    parent_page = page.get_parent().specific
-    if hasattr(parent_page, 'get_translation'):
-        # Parent page defaults to parent of source page
-        parent_page = parent_page.get_translation(new_language)
+    # Parent page defaults to the translation of the parent of the source
+    # page, or the parent itself when it has no translation
+    parent_page = page.get_translation_parent(new_language)
+    if parent_page is None:
+        parent_page = page.get_parent()
 
     # Check if the user has permission to publish subpages on the parent
     can_publish = parent_page.permissions_for_user(request.user). \
@@ -26,6 +35,7 @@ def add_translation(request, page_id, language_code):
 
     # Create the form
     form = AddTranslationForm(request.POST or None, page=page,
+                              language=new_language,
                               can_publish=can_publish,
                               parent_page=parent_page)
 
@@ -53,24 +63,63 @@ def add_translation(request, page_id, language_code):
             can_publish = parent_page.permissions_for_user(request.user).\
                 can_publish_subpage()
 
-            # Copy the page
-            page.copy(
-                # recursive=form.cleaned_data.get('copy_subpages'),
-                to=parent_page,
-                update_attrs={
-                    'title': form.cleaned_data['new_title'],
-                    'slug': form.cleaned_data['new_slug'],
-                    'language': new_language,
-                },
-                keep_live=(can_publish and
-                           form.cleaned_data.get('publish_copies')),
-                user=request.user,
-            )
-
-            # Give a success message back to the user
-            messages.success(request,
-                             _("Page '{0}' translated.").format(
-                                 page.get_admin_display_title()))
+            keep_live = (can_publish and
+                         form.cleaned_data.get('publish_copies'))
+
+            if get_setting('TRANSLATION_JOBS'):
+                # Leave the copying to a worker
+                enqueue_translation(
+                    page, new_language, parent_page,
+                    user=request.user,
+                    title=form.cleaned_data['new_title'],
+                    slug=form.cleaned_data['new_slug'],
+                    copy_subpages=bool(form.cleaned_data.get('copy_subpages')),
+                    keep_live=bool(keep_live),
+                )
+
+                messages.success(
+                    request,
+                    _("Translation of page '{0}' into {1} queued.").format(
+                        page.get_admin_display_title(), new_language))
+
+                if next_url:
+                    return redirect(next_url)
+                return redirect('wagtail_page_translation:index', page.id)
+            elif form.cleaned_data.get('copy_subpages'):
+                # Translate the whole subtree in batches
+                stats = translate_subtree(
+                    page, new_language, parent_page,
+                    user=request.user,
+                    keep_live=keep_live,
+                    root_attrs={
+                        'title': form.cleaned_data['new_title'],
+                        'slug': form.cleaned_data['new_slug'],
+                    },
+                )
+
+                messages.success(
+                    request,
+                    _("Page '{0}' translated: {1} pages created, {2} moved, "
+                      "{3} skipped.").format(
+                        page.get_admin_display_title(), stats['created'],
+                        stats['moved'], stats['skipped']))
+            else:
+                # Copy the page
+                page.copy(
+                    to=parent_page,
+                    update_attrs={
+                        'title': form.cleaned_data['new_title'],
+                        'slug': form.cleaned_data['new_slug'],
+                        'language': new_language,
+                    },
+                    keep_live=keep_live,
+                    user=request.user,
+                )
+
+                # Give a success message back to the user
+                messages.success(request,
+                                 _("Page '{0}' translated.").format(
+                                     page.get_admin_display_title()))
 
             # Redirect to explore of parent page
             if next_url:
@@ -87,19 +136,104 @@ def add_translation(request, page_id, language_code):
         })
 
 
+@measure('admin.revisions_index')
 def revisions_index(request, page_id):
     page = get_object_or_404(Page, id=page_id).specific
     languages = []
 
-    for language in Language.objects.all():
+    for language in Language.objects.all_languages():
         languages.append({
             'language': language,
             'translation': page.get_translation(language)
         })
 
+    # Recent translation jobs of all pages of the translation group
+    jobs = (
+        TranslationJob.objects
+        .filter(page__translation_key=page.translation_key)
+        .select_related('language')
+        .order_by('-created_at')[:10])
+    jobs_active = any(
+        job.status in (TranslationJob.STATUS_PENDING,
+                       TranslationJob.STATUS_RUNNING)
+        for job in jobs)
+
     page_perms = page.permissions_for_user(request.user)
     return render(request, 'wagtail_page_translation/translation/index.html', {
         'page': page,
         'page_perms': page_perms,
         'languages': languages,
+        'jobs': jobs,
+        'jobs_active': jobs_active,
     })
+
+
+@measure('admin.coverage')
+def coverage(request, page_id):
+    """Show which translations exist for the pages below `page_id`.
+
+    Rows are translation groups with a page in the subtree, columns are
+    languages. A page of rows costs a count, the rows and one aggregated
+    query for the translations, regardless of the number of languages.
+    """
+    page = get_object_or_404(Page, id=page_id).specific
+    languages = Language.objects.all_languages()
+
+    paginator, groups = paginate(
+        request, get_subtree_translation_keys(page), per_page=50)
+    translations = fetch_translation_coverage(
+        group['translation_key'] for group in groups)
+
+    rows = []
+    for group in groups:
+        cells = translations[group['translation_key']]
+        source = next(
+            (cell for cell in cells.values() if cell.path == group['path']),
+            None)
+        if source is None:
+            # The page was moved or deleted since the groups were listed
+            continue
+        rows.append({
+            'source': source,
+            # Nesting below `page`, to indent the titles
+            'level': len(group['path']) // Page.steplen - page.depth,
+            'cells': [
+                {'language': language, 'translation': cells.get(language.pk)}
+                for language in languages
+            ],
+        })
+
+    return render(
+        request, 'wagtail_page_translation/translation/coverage.html', {
+            'page': page,
+            'languages': languages,
+            'groups': groups,
+            'rows': rows,
+        })
+
+
+@measure('admin.stale')
+def stale(request, page_id):
+    """List the translations below `page_id` whose source page changed.
+
+    Translations are ordered by the time their source changed, the oldest
+    changes first.
+    """
+    page = get_object_or_404(Page, id=page_id).specific
+    translations = (
+        TranslatablePage.objects
+        .descendant_of(page, inclusive=True)
+        .stale()
+        .select_related('translation_source__source')
+        .order_by('translation_source__changed_at', 'path'))
+
+    paginator, translations = paginate(request, translations, per_page=50)
+    for translation in translations:
+        translation._cache_language()
+        translation.translation_source.source._cache_language()
+
+    return render(
+        request, 'wagtail_page_translation/translation/stale.html', {
+            'page': page,
+            'translations': translations,
+        })
@@ -0,0 +1,168 @@
+"""Pre-populate the caches of the translation lookups.
+
+After a deploy or a cache flush every request misses the caches at once.
+`warm_caches` fills them ahead of the traffic: the language registry and
+the site roots, the root page redirects, the `hreflang` alternates and,
+when enabled, the language switchers of all translation groups.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.db import connections
+from django.utils import translation
+
+from wagtail.wagtailcore.models import Site
+
+from .cache import get_cache, language_registry
+from .conf import get_setting
+from .models import AbstractTranslationIndexPage, TranslationGroupMember
+from .resolvers import (
+    fetch_translation_groups, get_child_urls, get_site_roots,
+    get_translation_alternates_many, get_translation_urls)
+from .templatetags.get_languages import (
+    get_page_languages, get_switcher_cache_keys)
+from .utils import iterate_in_chunks
+
+
+class RateLimiter(object):
+    """Thread safe limit of the number of items handled per second."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.time()
+
+    def wait(self, count):
+        """Block until `count` more items may be handled."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.time()
+            start = max(self._next, now)
+            self._next = start + count / float(self.rate)
+        if start > now:
+            time.sleep(start - now)
+
+
+def warm_index_pages():
+    """Cache the URLs the translation index pages redirect to.
+
+    :return: number of index pages
+
+    """
+    count = 0
+    for model in apps.get_models():
+        if not issubclass(model, AbstractTranslationIndexPage):
+            continue
+        for page in model.objects.all():
+            get_child_urls(page)
+            count += 1
+    return count
+
+
+def warm_switchers(groups):
+    """Cache the language switchers of the live pages of groups.
+
+    :param groups: dict of translation key to a list of `TranslationMember`
+
+    """
+    timeout = get_setting('LANGUAGE_SWITCHER_CACHE_TIMEOUT')
+    if not timeout:
+        return
+
+    languages = language_registry.get_state().by_id
+    values = {}
+    for translation_key, members in groups.items():
+        translated_urls = get_translation_urls(
+            translation_key, members=members)
+        for member in members:
+            language = languages.get(member.language_id)
+            if not member.live or language is None or not language.live:
+                continue
+            # Pages activate their language while they are served
+            with translation.override(language.code):
+                cache_key = get_switcher_cache_keys([member])[0]
+                values[cache_key] = get_page_languages(
+                    member, translated_urls=translated_urls)
+    get_cache().set_many(values, timeout)
+
+
+def warm_groups(translation_keys):
+    """Cache the alternates and language switchers of groups."""
+    get_translation_alternates_many(translation_keys)
+    warm_switchers(fetch_translation_groups(translation_keys))
+
+
+def warm_caches(chunk_size=500, workers=1, rate=None, progress=None):
+    """Warm the caches of all translation groups.
+
+    The groups are warmed in chunks ordered by translation key. With more
+    than one worker the chunks are spread over a pool of threads with a
+    database connection each.
+
+    :param chunk_size: number of translation groups warmed at once
+    :param workers: number of chunks warmed at the same time
+    :param rate: maximum number of groups warmed per second, None for no
+        limit
+    :param progress: callable receiving the number of groups warmed so far
+        and the seconds elapsed
+    :return: dict with the number of `groups` and `index_pages` warmed,
+        the `seconds` taken and the `groups_per_second`
+
+    """
+    start = time.time()
+    language_registry.get_state()
+    Site.get_site_root_paths()
+    get_site_roots()
+    index_pages = warm_index_pages()
+
+    limiter = RateLimiter(rate)
+    lock = threading.Lock()
+    chunks = iterate_in_chunks(
+        TranslationGroupMember.objects
+        .values_list('translation_key')
+        .distinct(),
+        chunk_size, key='translation_key')
+    stats = {'groups': 0}
+
+    def next_chunk():
+        with lock:
+            chunk = next(chunks, None)
+        if chunk is not None:
+            limiter.wait(len(chunk))
+        return chunk
+
+    def work():
+        chunk = next_chunk()
+        while chunk is not None:
+            warm_groups([row[0] for row in chunk])
+            with lock:
+                stats['groups'] += len(chunk)
+                if progress:
+                    progress(stats['groups'], time.time() - start)
+            chunk = next_chunk()
+
+    if workers <= 1:
+        work()
+    else:
+        def work_in_thread():
+            try:
+                work()
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(work_in_thread) for i in range(workers)]
+            for future in futures:
+                future.result()
+
+    seconds = time.time() - start
+    return {
+        'groups': stats['groups'],
+        'index_pages': index_pages,
+        'seconds': seconds,
+        'groups_per_second': stats['groups'] / seconds if seconds else 0,
+    }